@@ -1,19 +1,26 @@
 """
 FastAPI + HTMX 前端：编辑压缩包内 ComicInfo.xml。
 """
+import asyncio
+import functools
+import itertools
 import os
 import re
+import threading
 import time
 import uuid
 import urllib.parse
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any
 import csv
 import io
 
+import jinja2
 from starlette.responses import StreamingResponse
 
 from fastapi import FastAPI, Form, Request, UploadFile
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.templating import Jinja2Templates
@@ -23,6 +30,11 @@ try:
 except ImportError:
     lazy_pinyin = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from edit_archive_xml import (
     ALL_MARK,
     CSV_HEADERS,
@@ -32,13 +44,14 @@ from edit_archive_xml import (
     batch_prefix,
     batch_set,
     batch_suffix,
-    export_csv,
+    export_csv_filename,
+    export_csv_iter,
     extract_headers,
-    import_csv_content,
+    import_csv_file,
     list_dirs_with_archives,
     preview_rename_by_rule,
     rename_archives_by_rule,
-    scan_archives,
+    scan_archives_iter,
     save_archives,
     save_archives_streaming,
     opencc,
@@ -51,6 +64,47 @@ ALLOWED_BASE_PATHS: list[str] = [
 ]
 
 
+# 规范化后的根目录前缀（以路径分隔符结尾），导入时计算一次，校验时只需一次 startswith
+_ALLOWED_PREFIXES: tuple[str, ...] = tuple(
+    os.path.abspath(os.path.normpath(p)).rstrip(os.sep) + os.sep for p in ALLOWED_BASE_PATHS
+)
+
+# JSON 接口的响应类：装有 orjson 时用 ORJSONResponse（序列化更快，大 csv_text 尤其明显）
+_JSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+# 表单 / JSON 中表示「真」的取值
+_TRUTHY = frozenset({"1", "true", "yes", "on", "y", "t"})
+
+
+def _truthy(value: Any) -> bool:
+    """将表单或 JSON 传入的开关值（字符串、布尔等）解析为 bool。"""
+    return str(value).strip().lower() in _TRUTHY
+
+
+async def _read_json_body(request: Request) -> dict:
+    """读取 JSON 请求体；装有 orjson 时直接解析原始字节。解析失败或非对象时返回空 dict。"""
+    try:
+        if orjson is not None:
+            payload = orjson.loads(await request.body())
+        else:
+            payload = await request.json()
+    except Exception:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+# 渲染 <option> 时转义属性值，单次 translate 代替链式 replace
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def _is_under_allowed_prefix(abs_path: str) -> bool:
+    """仅做前缀判断（不访问磁盘）：abs_path 须为已规范化的绝对路径。未配置白名单时恒为 True。"""
+    if not _ALLOWED_PREFIXES:
+        return True
+    # 路径本身或其父目录链命中某个根目录前缀即视为允许
+    return (abs_path + os.sep).startswith(_ALLOWED_PREFIXES)
+
+
 def ensure_allowed_path(path: str) -> str | None:
     """将路径规范为绝对路径并校验：若配置了 ALLOWED_BASE_PATHS 则必须在某条根目录下，否则仅要求路径存在。"""
     if not path or not path.strip():
@@ -58,16 +112,8 @@ def ensure_allowed_path(path: str) -> str | None:
     abs_path = os.path.abspath(os.path.normpath(path.strip()))
     if not os.path.exists(abs_path):
         return None
-    if not ALLOWED_BASE_PATHS:
+    if _is_under_allowed_prefix(abs_path):
         return abs_path
-    for base in ALLOWED_BASE_PATHS:
-        base_abs = os.path.abspath(os.path.normpath(base))
-        try:
-            common = os.path.commonpath([abs_path, base_abs])
-            if common == base_abs or abs_path == base_abs:
-                return abs_path
-        except ValueError:
-            continue
     return None
 
 
@@ -87,18 +133,68 @@ def check_scan_dir(path: str) -> tuple[str | None, str]:
 
 
 def ensure_archives_allowed(archives: list[str]) -> bool:
-    """检查 session 中的 archives 路径均在白名单内。"""
-    for ap in archives:
-        if ensure_allowed_path(ap) is None:
-            return False
-    return True
+    """
+    检查 session / 扫描缓存中的 archives 路径均在白名单内。
+    这些路径来自服务端扫描结果，只做前缀判断、不逐个 stat；文件是否仍存在由后续读写处理。
+    未配置白名单时直接通过。
+    """
+    if not _ALLOWED_PREFIXES:
+        return True
+    return all(_is_under_allowed_prefix(os.path.abspath(os.path.normpath(ap))) for ap in archives)
+
+
+class _TTLCache:
+    """
+    容量有限、带过期时间的 LRU 缓存（仅支持本模块用到的 get / 赋值）。
+    - 超过 maxsize 时淘汰最久未使用的条目
+    - 过期条目在访问或写入时惰性清除
+    读写加锁，可在线程池中共享。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            if item[0] < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return item[1]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now + self.ttl, value)
+            self._data.move_to_end(key)
+            # 从最久未使用端清理已过期条目，再按容量淘汰
+            while self._data:
+                oldest = next(iter(self._data.values()))
+                if oldest[0] >= now:
+                    break
+                self._data.popitem(last=False)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
 
 # 扫描结果服务端缓存，避免 archives 列表过大导致 session cookie 超限、保存时 session 为空
-# key: token, value: {"archives": [...], "comic_dir": str, "ts": float}
-_SCAN_CACHE: dict[str, dict] = {}
+# key: token, value: {"archives": [...], "comic_dir": str, "orig_rows": {...}, "scan_log": str}
+# 条目数有上限（可用环境变量 MANGATAG_SCAN_CACHE_MAX 调整）且 24 小时过期，长时间运行时内存不会无限增长
 _CACHE_TTL_SEC = 3600 * 24  # 24 小时
-
+try:
+    _SCAN_CACHE_MAX = max(1, int(os.environ.get("MANGATAG_SCAN_CACHE_MAX", "256")))
+except ValueError:
+    _SCAN_CACHE_MAX = 256
+_SCAN_CACHE = _TTLCache(maxsize=_SCAN_CACHE_MAX, ttl=_CACHE_TTL_SEC)
 
 try:
     if opencc is not None:
@@ -137,15 +233,7 @@ def _normalize_t_s(text: str) -> set[str]:
     return forms
 
 
-def _match_dir_name(rel_path: str, query: str) -> bool:
-    """判断目录相对路径在简体/繁体/拼音等综合形式下是否匹配查询字符串。"""
-    query = (query or "").strip().lower()
-    if not query:
-        return True
-    search_val = _build_search_value(rel_path) or ""
-    return query in search_val.lower()
-
-
+@functools.lru_cache(maxsize=65536)
 def _build_search_value(rel_path: str) -> str:
     """
     构造用于 datalist 匹配的 value：
@@ -153,10 +241,9 @@ def _build_search_value(rel_path: str) -> str:
     - 若安装了 opencc，则追加繁->简、简->繁等多种形式
     - 若安装了 pypinyin，则追加整串拼音与首字母缩写
     这样浏览器原生匹配时，输入简体/繁体/拼音都能命中。
+    结果按 rel_path 缓存，避免每次搜索重复调用 opencc / pypinyin。
     """
     forms = _normalize_t_s(rel_path) or {rel_path}
-    if not isinstance(forms, set):
-        forms = set(forms)
 
     # 拼音形式
     if lazy_pinyin is not None:
@@ -181,6 +268,67 @@ def _build_search_value(rel_path: str) -> str:
     return " ".join(ordered) if ordered else rel_path
 
 
+# 子目录列表缓存：key 由基路径与其 mtime_ns 拼成，30 秒过期。
+# 反复切换下拉框时不必每次递归遍历；基路径直接子项变化时 mtime 改变即失效，更深层的变化靠过期时间兜底
+_DIRS_CACHE = _TTLCache(maxsize=64, ttl=30)
+
+
+def _list_dirs_cached(allowed_base: str) -> list[str]:
+    """带短期缓存的 list_dirs_with_archives。"""
+    try:
+        key = f"{allowed_base}\0{os.stat(allowed_base).st_mtime_ns}"
+    except OSError:
+        return list_dirs_with_archives(allowed_base)
+    rels = _DIRS_CACHE.get(key)
+    if rels is None:
+        rels = list_dirs_with_archives(allowed_base)
+        _DIRS_CACHE[key] = rels
+    return rels
+
+
+# 目录搜索索引：key 为基路径，value 为 (rels, entries, search_lowers)
+# entries 为可直接返回的 {"rel", "search"}，search_lowers 为与之一一对应的小写搜索串。
+# 索引由 _list_dirs_cached 的结果派生：目录列表缓存失效（基路径 mtime 变化或 30 秒过期）返回新列表时随之重建，
+# 深层新增的目录也会在过期后被搜到；容量与过期时间与 _DIRS_CACHE 一致
+_SEARCH_INDEX = _TTLCache(maxsize=64, ttl=30)
+
+
+def _get_search_index(allowed_base: str) -> tuple[list[dict[str, str]], list[str]]:
+    """返回基路径下漫画子目录的搜索索引 (entries, search_lowers)。"""
+    rels = _list_dirs_cached(allowed_base)
+    cached = _SEARCH_INDEX.get(allowed_base)
+    if cached is not None and cached[0] is rels:
+        return cached[1], cached[2]
+    entries: list[dict[str, str]] = []
+    search_lowers: list[str] = []
+    for rel in rels:
+        search = _build_search_value(rel)
+        entries.append({"rel": rel, "search": search})
+        search_lowers.append(search.lower())
+    _SEARCH_INDEX[allowed_base] = (rels, entries, search_lowers)
+    return entries, search_lowers
+
+
+def _build_orig_rows(csv_text: str, include: bool) -> dict[str, list[str]]:
+    """
+    单遍解析 CSV 文本，构建 FileName -> 行 的映射（用于保存时判断是否改动）。
+    include 为真且首行为表头时跳过首行；不先把所有行物化为列表。
+    """
+    orig_rows: dict[str, list[str]] = {}
+    try:
+        for i, r in enumerate(csv.reader(io.StringIO(csv_text or ""))):
+            if not r:
+                continue
+            if i == 0 and include and r[0] == "FileName":
+                continue
+            fn = r[0].strip()
+            if fn:
+                orig_rows[fn] = r
+    except Exception:
+        return {}
+    return orig_rows
+
+
 def _get_archives_from_token(token: str) -> tuple[list[str], str]:
     """从 token 取 archives；返回 (archives, comic_dir)。无效则 ([], "")。"""
     if not token or not token.strip():
@@ -188,19 +336,26 @@ def _get_archives_from_token(token: str) -> tuple[list[str], str]:
     entry = _SCAN_CACHE.get(token.strip())
     if not entry:
         return [], ""
-    if time.time() - entry.get("ts", 0) > _CACHE_TTL_SEC:
-        del _SCAN_CACHE[token.strip()]
-        return [], ""
     return entry.get("archives") or [], entry.get("comic_dir") or ""
 
 
-app = FastAPI(title="MangaTag - 编辑压缩包内 XML")
+app = FastAPI(title="MangaTag - 编辑压缩包内 XML", default_response_class=_JSONResponse)
 app.add_middleware(
     SessionMiddleware,
     secret_key=os.environ.get("SESSION_SECRET", "mangatag-edit-xml-secret-change-in-production"),
 )
 BASE_DIR = Path(__file__).resolve().parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+# 模板随版本发布、运行期间不会变化：关闭 auto_reload，渲染时不再逐次 stat 模板文件检查是否更新
+templates = Jinja2Templates(
+    env=jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(BASE_DIR / "templates")),
+        autoescape=True,
+        auto_reload=False,
+    )
+)
+
+
+_VERSION_RE = re.compile(r'version\s*=\s*["\']([^"\']+)["\']')
 
 
 def _get_version() -> str:
@@ -210,10 +365,14 @@ def _get_version() -> str:
         return "dev"
     try:
         text = pyproject.read_text(encoding="utf-8")
-        m = re.search(r'version\s*=\s*["\']([^"\']+)["\']', text)
+        m = _VERSION_RE.search(text)
         return m.group(1) if m else "dev"
     except Exception:
         return "dev"
+
+
+# pyproject.toml 仅在发布时变化，启动时解析一次即可
+APP_VERSION = _get_version()
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
 
@@ -232,16 +391,33 @@ async def index(request: Request):
             "all_mark": ALL_MARK,
             "sort_choices": ["按数字大小顺序", "按字母顺序", "按Number列数字大小排序"],
             "default_base_path": default_base_path,
-            "version": _get_version(),
+            "version": APP_VERSION,
         },
     )
 
 
+# 文件夹浏览的根路径：第一条允许根目录（未配置时为启动目录），导入时规范化一次
+_BROWSE_ROOT = (
+    os.path.abspath(os.path.normpath(ALLOWED_BASE_PATHS[0])) if ALLOWED_BASE_PATHS
+    else os.path.abspath(os.getcwd())
+)
+# 以分隔符结尾的根路径前缀，用于判断上级目录是否仍在根目录内
+_BROWSE_PREFIX = _BROWSE_ROOT.rstrip(os.sep) + os.sep
+
+
 def _browse_root() -> str:
     """获取浏览器的根路径。"""
-    if ALLOWED_BASE_PATHS:
-        return os.path.abspath(os.path.normpath(ALLOWED_BASE_PATHS[0]))
-    return os.path.abspath(os.getcwd())
+    return _BROWSE_ROOT
+
+
+@app.get("/healthz")
+async def healthz():
+    """健康检查，附带各服务端缓存的当前条目数，便于观察淘汰情况。"""
+    return _JSONResponse({
+        "ok": True,
+        "scan_cache": len(_SCAN_CACHE),
+        "scan_jobs": len(_SCAN_JOBS),
+    })
 
 
 @app.get("/api/browse")
@@ -250,36 +426,36 @@ async def api_browse(path: str = ""):
     if path and path.strip():
         current = ensure_allowed_path(path.strip())
         if not current or not os.path.isdir(current):
-            return JSONResponse({"error": "路径无效或不在允许范围内"}, status_code=400)
+            return _JSONResponse({"error": "路径无效或不在允许范围内"}, status_code=400)
     else:
         current = _browse_root()
         if not os.path.isdir(current):
-            return JSONResponse({"error": "根目录不存在"}, status_code=400)
+            return _JSONResponse({"error": "根目录不存在"}, status_code=400)
 
     parent = os.path.dirname(current) if current != os.path.dirname(current) else None
     if ALLOWED_BASE_PATHS:
-        base_abs = os.path.abspath(os.path.normpath(ALLOWED_BASE_PATHS[0]))
-        if parent and parent != current:
-            try:
-                if os.path.commonpath([parent, base_abs]) != base_abs and parent != base_abs:
-                    parent = None
-            except ValueError:
-                parent = None
+        base_abs = _BROWSE_ROOT
+        # 上级目录须为根目录本身或位于其下：一次前缀判断代替 commonpath
+        if parent and parent != current and not (parent + os.sep).startswith(_BROWSE_PREFIX):
+            parent = None
         if current == base_abs:
             parent = None
 
     entries: list[dict] = []
     try:
-        for name in sorted(os.listdir(current)):
-            full = os.path.join(current, name)
-            if os.path.isdir(full):
-                if ALLOWED_BASE_PATHS and ensure_allowed_path(full) is None:
-                    continue
-                entries.append({"name": name, "path": full})
+        # scandir 的 DirEntry.is_dir() 多数情况下直接使用目录项类型，无需逐项 stat
+        with os.scandir(current) as it:
+            dir_entries = [e for e in it if e.is_dir()]
+        dir_entries.sort(key=lambda e: e.name)
+        # current 已通过校验，子目录只需做廉价的前缀判断
+        for e in dir_entries:
+            if not _is_under_allowed_prefix(e.path):
+                continue
+            entries.append({"name": e.name, "path": e.path})
     except OSError as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return _JSONResponse({"error": str(e)}, status_code=500)
 
-    return JSONResponse({
+    return _JSONResponse({
         "current": current,
         "parent": parent,
         "entries": entries,
@@ -294,9 +470,10 @@ async def api_dirs_search(base_path: str = "", q: str = "", limit: int = 50):
     """
     allowed_base = ensure_allowed_path(base_path) if base_path else None
     if not allowed_base or not os.path.isdir(allowed_base):
-        return JSONResponse({"entries": []})
-    raw_entries = list_dirs_with_archives(allowed_base)
-    q = (q or "").strip()
+        return _JSONResponse({"entries": []})
+    # 索引失效时需递归遍历目录并做繁简转换，放到线程中执行
+    entries, search_lowers = await asyncio.to_thread(_get_search_index, allowed_base)
+    q = (q or "").strip().lower()
     try:
         limit_int = int(limit)
     except (TypeError, ValueError):
@@ -304,21 +481,26 @@ async def api_dirs_search(base_path: str = "", q: str = "", limit: int = 50):
     if limit_int <= 0:
         limit_int = 50
 
-    def _wrap(rel: str) -> dict[str, str]:
-        return {"rel": rel, "search": _build_search_value(rel)}
-
     # 无关键字时返回前 N 条（带复合搜索 value）
     if not q:
-        entries = [_wrap(rel) for rel in raw_entries[:limit_int]]
-        return JSONResponse({"entries": entries})
+        return _JSONResponse({"entries": entries[:limit_int]})
+
+    # 在简体/繁体/拼音等综合形式（已预先小写）中做子串匹配：
+    # 查询编译一次，compress + islice 让逐行匹配与截断都在 C 层完成
+    pattern = re.compile(re.escape(q))
+    hits = itertools.compress(entries, map(pattern.search, search_lowers))
+    return _JSONResponse({"entries": list(itertools.islice(hits, limit_int))})
+
 
-    matched: list[dict[str, str]] = []
+def _iter_dir_options(raw_entries: list[str], allowed_base: str):
+    """逐条生成 /api/dirs 的 <option> 片段（跳过不在允许范围内的子目录），供一次性 join。"""
+    yield '<option value="">-- 选择 --</option>'
     for rel in raw_entries:
-        if _match_dir_name(rel, q):
-            matched.append(_wrap(rel))
-            if len(matched) >= limit_int:
-                break
-    return JSONResponse({"entries": matched})
+        full = os.path.normpath(os.path.join(allowed_base, rel))
+        if not _is_under_allowed_prefix(full):
+            continue
+        esc = rel.translate(_HTML_ESCAPE)
+        yield f'<option value="{esc}">{rel}</option>'
 
 
 @app.get("/api/dirs", response_class=HTMLResponse)
@@ -329,15 +511,94 @@ async def api_dirs(request: Request, base_path: str = ""):
         return HTMLResponse(
             '<option value="">-- 路径无效或不在允许范围内 --</option>'
         )
-    raw_entries = list_dirs_with_archives(allowed_base)
-    options = ['<option value="">-- 选择 --</option>']
-    for rel in raw_entries:
-        full = os.path.normpath(os.path.join(allowed_base, rel))
-        if ensure_allowed_path(full) is None:
-            continue
-        esc = rel.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
-        options.append(f'<option value="{esc}">{rel}</option>')
-    return HTMLResponse("\n".join(options))
+    raw_entries = await asyncio.to_thread(_list_dirs_cached, allowed_base)
+    return HTMLResponse("\n".join(_iter_dir_options(raw_entries, allowed_base)))
+
+
+# 流式日志接口每次发送最多合并的行数，减少逐行 encode 与 ASGI send 的次数
+_STREAM_BATCH_LINES = 32
+
+# 进行中的扫描：前端一次点击会同时请求 /scan-json（取结果）与 /scan-stream（看日志），
+# 二者参数相同，共享同一次扫描即可，避免重复读取磁盘，/scan-stream 也能实时输出进度。
+# 两类请求都已加入或扫描结束即移除，已完成的扫描不会被之后的请求复用。
+# key: (comic_dir, include_header, sort_mode)
+_SCAN_JOBS: dict[tuple[str, bool, str], "_ScanJob"] = {}
+
+
+class _ScanJob:
+    """
+    在工作线程中运行的一次扫描：日志逐行累积，结束后保存结果，可被多个请求同时等待。
+    客户端断开不会取消扫描本身。
+    """
+
+    def __init__(self, key: tuple[str, bool, str]):
+        self.logs: list[str] = []
+        self.result: tuple[str, list[str], dict[str, list[str]]] = ("", [], {})
+        self.error: Exception | None = None
+        self.finished = False
+        # 已加入的请求类别："result"（/scan、/scan-json）、"log"（/scan-stream）
+        self.roles: set[str] = set()
+        self._changed = asyncio.Condition()
+        self._task = asyncio.ensure_future(self._run(key))
+
+    async def _run(self, key: tuple[str, bool, str]) -> None:
+        try:
+            items = scan_archives_iter(*key)
+            async for batch in _iter_in_thread(items, batch=_STREAM_BATCH_LINES):
+                for kind, value in batch:
+                    if kind == "log":
+                        self.logs.append(value)
+                    else:
+                        self.result = value
+                async with self._changed:
+                    self._changed.notify_all()
+        except Exception as e:  # noqa: BLE001
+            self.error = e
+        finally:
+            self.finished = True
+            if _SCAN_JOBS.get(key) is self:
+                del _SCAN_JOBS[key]
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def follow_logs(self):
+        """从第一行开始逐批产出日志行（list[str]），扫描结束且已全部产出后返回。"""
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: len(self.logs) > sent or self.finished
+                )
+            if len(self.logs) > sent:
+                batch = self.logs[sent:]
+                sent += len(batch)
+                yield batch
+            elif self.finished:
+                return
+
+    async def wait_result(self) -> tuple[str, str, list[str], dict[str, list[str]]]:
+        """等待扫描结束，返回 (csv_text, scan_log, archives, orig_rows)；扫描出错时抛出原异常。"""
+        await asyncio.shield(self._task)
+        if self.error is not None:
+            raise self.error
+        csv_text, archives, orig_rows = self.result
+        return csv_text, "\n".join(self.logs), archives, orig_rows
+
+
+def _join_scan_job(key: tuple[str, bool, str], role: str) -> _ScanJob:
+    """
+    加入参数相同、且该类请求尚未加入过的进行中扫描；否则开始新扫描。
+    同类请求再次到来说明是新的一次点击，必须重新扫描，不复用旧结果。
+    """
+    job = _SCAN_JOBS.get(key)
+    if job is None or job.finished or role in job.roles:
+        job = _ScanJob(key)
+        _SCAN_JOBS[key] = job
+    job.roles.add(role)
+    if len(job.roles) >= 2 and _SCAN_JOBS.get(key) is job:
+        # 结果与日志两类请求都已加入，不会再有请求共享这次扫描
+        del _SCAN_JOBS[key]
+    return job
 
 
 @app.post("/scan", response_class=HTMLResponse)
@@ -347,43 +608,35 @@ async def post_scan(
     include_header: str = Form("true"),
     sort_mode: str = Form("按数字大小顺序"),
 ):
-    """扫描目录，生成 CSV 并写入 session；返回扫描日志与 CSV 区的 OOB 片段。"""
+    """扫描目录，生成 CSV 并存入服务端缓存（session 只记 token）；返回扫描日志与 CSV 区的 OOB 片段。"""
     session = request.session
-    include = include_header.lower() in ("1", "true", "yes", "on")
+    include = _truthy(include_header)
     allowed, err = check_scan_dir(comic_dir)
     if not allowed:
-        session["scan_log"] = "错误：" + (err or "目录不存在或不在允许范围内。")
-        session["last_csv"] = ""
+        msg = "错误：" + (err or "目录不存在或不在允许范围内。")
+        # 旧版本曾把整份 CSV、日志存进 session，顺带清掉，缩小 Cookie；日志只随响应返回
+        for k in ("last_csv", "scan_log", "save_log"):
+            session.pop(k, None)
+        session.pop("scan_token", None)
         session["archives"] = []
         session["comic_dir"] = ""
         return templates.TemplateResponse(
             "partials/scan_result.html",
             {
                 "request": request,
-                "scan_log": session["scan_log"],
+                "scan_log": msg,
                 "csv_text": "",
                 "scan_token": "",
                 "csv_headers": CSV_HEADERS,
             },
         )
-    csv_text, scan_log, archives = scan_archives(allowed, include, sort_mode)
-    session["scan_log"] = scan_log
+    # orig_rows 为「扫描时」的原始行映射，用于后续保存时判断是否改动
+    job = _join_scan_job((allowed, include, sort_mode), "result")
+    csv_text, scan_log, archives, orig_rows = await job.wait_result()
+    # 日志可能很长，不进 session（Cookie 超过约 4KB 会被浏览器丢弃），随响应返回并存入服务端缓存
+    session.pop("scan_log", None)
+    session.pop("save_log", None)
     session["comic_dir"] = allowed
-    # 基于当前 CSV 内容构建「扫描时」的原始行映射，用于后续保存时判断是否改动
-    orig_rows: dict[str, list[str]] = {}
-    try:
-        reader = csv.reader(io.StringIO(csv_text or ""))
-        rows = list(reader)
-        start_idx = 1 if include and rows else 0
-        for r in rows[start_idx:]:
-            if not r:
-                continue
-            fn = (r[0] if len(r) > 0 else "").strip()
-            if not fn:
-                continue
-            orig_rows[fn] = r
-    except Exception:
-        orig_rows = {}
 
     # 用服务端缓存存 archives 与原始行，避免 session cookie 过大导致保存时 session 为空
     scan_token = uuid.uuid4().hex
@@ -391,8 +644,10 @@ async def post_scan(
         "archives": archives,
         "comic_dir": allowed,
         "orig_rows": orig_rows,
-        "ts": time.time(),
+        "scan_log": scan_log,
     }
+    # session 只记 token（几十字节），导出等需要时再从服务端缓存取 archives
+    session["scan_token"] = scan_token
     return templates.TemplateResponse(
         "partials/scan_result.html",
         {
@@ -414,27 +669,24 @@ async def post_scan_stream(
 ):
     """仅返回扫描日志的流式输出（逐行文本），便于观察长时间扫描进度。"""
     session = request.session
-    include = include_header.lower() in ("1", "true", "yes", "on")
+    include = _truthy(include_header)
     allowed, err = check_scan_dir(comic_dir)
     if not allowed:
-        session["scan_log"] = "错误：" + (err or "目录不存在或不在允许范围内。")
-        session["last_csv"] = ""
+        msg = "错误：" + (err or "目录不存在或不在允许范围内。")
+        # 旧版本曾把整份 CSV、日志存进 session，顺带清掉，缩小 Cookie；日志只随响应返回
+        for k in ("last_csv", "scan_log", "save_log"):
+            session.pop(k, None)
+        session.pop("scan_token", None)
         session["archives"] = []
         session["comic_dir"] = ""
+        return PlainTextResponse(msg + "\n")
 
-        def err_gen():
-            msg = session["scan_log"]
-            yield (msg + "\n").encode("utf-8")
-
-        return StreamingResponse(err_gen(), media_type="text/plain; charset=utf-8")
+    # 与同一次点击发出的 /scan-json 共享扫描，边扫描边输出日志
+    job = _join_scan_job((allowed, include, sort_mode), "log")
 
-    def gen():
-        # 这里会完整执行一次扫描，然后将扫描日志按行输出。
-        # 注意：/scan 本身也会执行一次扫描以生成 CSV 与缓存，因此同一次操作会扫描两次。
-        # 若后续需要进一步优化，可考虑重构为共享一次扫描结果。
-        _, scan_log, _ = scan_archives(allowed, include, sort_mode)
-        for line in (scan_log or "").splitlines():
-            yield (line + "\n").encode("utf-8")
+    async def gen():
+        async for lines in job.follow_logs():
+            yield ("\n".join(lines) + "\n").encode("utf-8")
 
     return StreamingResponse(gen(), media_type="text/plain; charset=utf-8")
 
@@ -451,43 +703,34 @@ async def post_scan_json(
     { ok, error?, csv_text?, scan_log?, scan_token? }。
     """
     session = request.session
-    include = include_header.lower() in ("1", "true", "yes", "on")
+    include = _truthy(include_header)
     allowed, err = check_scan_dir(comic_dir)
     if not allowed:
         msg = "错误：" + (err or "目录不存在或不在允许范围内。")
-        session["scan_log"] = msg
+        session.pop("scan_log", None)
+        session.pop("save_log", None)
         session["comic_dir"] = ""
-        return JSONResponse({"ok": False, "error": msg}, status_code=400)
-
-    csv_text, scan_log, archives = scan_archives(allowed, include, sort_mode)
-    session["scan_log"] = scan_log
+        return _JSONResponse({"ok": False, "error": msg}, status_code=400)
+
+    # orig_rows 为「扫描时」的原始行映射
+    job = _join_scan_job((allowed, include, sort_mode), "result")
+    csv_text, scan_log, archives, orig_rows = await job.wait_result()
+    # 日志可能很长，不进 session（Cookie 超过约 4KB 会被浏览器丢弃），随响应返回并存入服务端缓存
+    session.pop("scan_log", None)
+    session.pop("save_log", None)
     session["comic_dir"] = allowed
 
-    # 构建「扫描时」的原始行映射
-    orig_rows: dict[str, list[str]] = {}
-    try:
-        reader = csv.reader(io.StringIO(csv_text or ""))
-        rows = list(reader)
-        start_idx = 1 if include and rows else 0
-        for r in rows[start_idx:]:
-            if not r:
-                continue
-            fn = (r[0] if len(r) > 0 else "").strip()
-            if not fn:
-                continue
-            orig_rows[fn] = r
-    except Exception:
-        orig_rows = {}
-
     # 缓存 archives 与原始行，避免存入 session
     scan_token = uuid.uuid4().hex
     _SCAN_CACHE[scan_token] = {
         "archives": archives,
         "comic_dir": allowed,
         "orig_rows": orig_rows,
-        "ts": time.time(),
+        "scan_log": scan_log,
     }
-    return JSONResponse(
+    # session 只记 token（几十字节），导出等需要时再从服务端缓存取 archives
+    session["scan_token"] = scan_token
+    return _JSONResponse(
         {
             "ok": True,
             "csv_text": csv_text,
@@ -511,43 +754,99 @@ async def post_save(
     archives, _ = _get_archives_from_token(scan_token)
     if not archives:
         archives = session.get("archives") or []
+    # 扫描日志取自服务端缓存，保存日志只随响应返回，均不写入 session
+    scan_log = cache_entry.get("scan_log", "")
     if not archives:
-        session["save_log"] = "请先扫描目录以建立压缩包顺序。"
         return templates.TemplateResponse(
             "partials/save_log.html",
             {
                 "request": request,
-                "save_log": session["save_log"],
-                "scan_log": session.get("scan_log", ""),
+                "save_log": "请先扫描目录以建立压缩包顺序。",
+                "scan_log": scan_log,
             },
         )
     if not ensure_archives_allowed(archives):
-        session["save_log"] = "错误：扫描到的压缩包路径不在允许范围内。"
         return templates.TemplateResponse(
             "partials/save_log.html",
             {
                 "request": request,
-                "save_log": session["save_log"],
-                "scan_log": session.get("scan_log", ""),
+                "save_log": "错误：扫描到的压缩包路径不在允许范围内。",
+                "scan_log": scan_log,
             },
         )
     # 若表单未带上 csv_text（如 HTMX 未包含到），此时视为无可保存内容，由 save_archives 负责给出提示
-    include = include_header.lower() in ("1", "true", "yes", "on")
-    check = check_count.lower() in ("1", "true", "yes", "on")
+    include = _truthy(include_header)
+    check = _truthy(check_count)
     orig_rows = cache_entry.get("orig_rows") or None
-    save_log, _ = save_archives(archives, csv_text or "", include, check, orig_rows)
-    session["save_log"] = save_log
+    save_log, _ = await asyncio.to_thread(
+        save_archives, archives, csv_text or "", include, check, orig_rows
+    )
     return templates.TemplateResponse(
         "partials/save_log.html",
         {
             "request": request,
             "save_log": save_log,
-            "scan_log": session.get("scan_log", ""),
+            "scan_log": scan_log,
         },
     )
 
 
-def _save_stream_generator(
+async def _iter_in_thread(iterable, maxsize: int = 64, batch: int = 1):
+    """
+    在工作线程中迭代同步生成器，通过有界 asyncio.Queue 将产出逐条交给异步生成器。
+    这样 StreamingResponse 拿到的是异步迭代器，不必每次 yield 都切换线程池；
+    队列有界，客户端读得慢时生产者会等待，内存占用不随输出总量增长。
+    消费方提前退出（如客户端断开）时通知生产者停止。
+    batch > 1 时改为产出列表：把队列中已就绪的条目（至多 batch 条）合并为一批，
+    不为凑满一批而等待，因此不会推迟实时进度的输出。
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def put(item: Any) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                put(item)
+                if stop.is_set():
+                    break
+        finally:
+            if not stop.is_set():
+                put(done)
+
+    producer = asyncio.ensure_future(asyncio.to_thread(produce))
+    try:
+        finished = False
+        while not finished:
+            item = await queue.get()
+            if item is done:
+                break
+            if batch <= 1:
+                yield item
+                continue
+            items = [item]
+            while len(items) < batch and not queue.empty():
+                item = queue.get_nowait()
+                if item is done:
+                    finished = True
+                    break
+                items.append(item)
+            yield items
+    finally:
+        if not producer.done():
+            # 提前退出：置停止标志并清空队列，让阻塞中的 put 返回，生产者随即结束
+            stop.set()
+            while not queue.empty():
+                queue.get_nowait()
+    # 生产者异常在此抛出
+    await producer
+
+
+async def _save_stream_generator(
     archives: list[str],
     csv_text: str,
     include: bool,
@@ -555,8 +854,9 @@ def _save_stream_generator(
     original_rows: dict[str, list[str]] | None,
 ):
     """生成逐行日志，每行末尾带换行，便于前端按行追加。"""
-    for line in save_archives_streaming(archives, csv_text, include, check, original_rows):
-        yield (line + "\n").encode("utf-8")
+    lines = save_archives_streaming(archives, csv_text, include, check, original_rows)
+    async for batch in _iter_in_thread(lines, batch=_STREAM_BATCH_LINES):
+        yield ("\n".join(batch) + "\n").encode("utf-8")
 
 
 def _build_content_disposition(filename: str) -> str:
@@ -592,10 +892,7 @@ async def post_save_stream(request: Request):
     """
     session = request.session
 
-    try:
-        payload = await request.json()
-    except Exception:
-        payload = {}
+    payload = await _read_json_body(request)
 
     scan_token = str(payload.get("scan_token") or "")
     csv_text = str(payload.get("csv_text") or "")
@@ -607,16 +904,12 @@ async def post_save_stream(request: Request):
     if not archives:
         archives = session.get("archives") or []
     if not archives:
-        def err():
-            yield "请先扫描目录以建立压缩包顺序。\n".encode("utf-8")
-        return StreamingResponse(err(), media_type="text/plain; charset=utf-8")
+        return PlainTextResponse("请先扫描目录以建立压缩包顺序。\n")
     if not ensure_archives_allowed(archives):
-        def err():
-            yield "错误：扫描到的压缩包路径不在允许范围内。\n".encode("utf-8")
-        return StreamingResponse(err(), media_type="text/plain; charset=utf-8")
+        return PlainTextResponse("错误：扫描到的压缩包路径不在允许范围内。\n")
 
-    include = str(include_raw).lower() in ("1", "true", "yes", "on")
-    check = str(check_raw).lower() in ("1", "true", "yes", "on")
+    include = _truthy(include_raw)
+    check = _truthy(check_raw)
     orig_rows = cache_entry.get("orig_rows") or None
     return StreamingResponse(
         _save_stream_generator(archives, csv_text or "", include, check, orig_rows),
@@ -626,18 +919,19 @@ async def post_save_stream(request: Request):
 
 @app.get("/export", response_class=Response)
 async def get_export(request: Request):
-    """从 session 取 comic_dir/archives，生成 CSV 下载（兼容旧链接）。不再依赖 last_csv，避免大 CSV 存入 Cookie。"""
+    """按 session 中的 scan_token 从服务端缓存取 archives，重新生成 CSV 下载（兼容旧链接）。Cookie 中不存 CSV。"""
     session = request.session
-    comic_dir = session.get("comic_dir", "")
-    archives = session.get("archives") or []
+    archives, comic_dir = _get_archives_from_token(session.get("scan_token", ""))
+    if not archives:
+        archives = session.get("archives") or []
+    comic_dir = comic_dir or session.get("comic_dir", "")
     include_header = True
-    # 传入空 csv_text，让 export_csv 根据 archives 重新生成 CSV 内容
-    data, filename = export_csv("", include_header, comic_dir, archives)
-    return Response(
-        content=data,
+    # 传入空 csv_text，让 export_csv_iter 根据 archives 逐个读取并流式输出 CSV 内容
+    return StreamingResponse(
+        _iter_in_thread(export_csv_iter("", include_header, archives)),
         media_type="text/csv; charset=utf-8",
         headers={
-            "Content-Disposition": _build_content_disposition(filename),
+            "Content-Disposition": _build_content_disposition(export_csv_filename(comic_dir)),
         },
     )
 
@@ -648,19 +942,21 @@ async def post_export(
     csv_text: str = Form(""),
     include_header: str = Form("true"),
     comic_dir: str = Form(""),
+    scan_token: str = Form(""),
 ):
-    """用当前提交的 csv_text 生成 CSV 下载，避免 session 为空导致内容为空。"""
+    """用当前提交的 csv_text 生成 CSV 下载；csv_text 为空时按 scan_token 对应的压缩包重新生成。"""
     session = request.session
     # 优先使用表单传入的章节目录（当前页面的章节压缩包目录），否则回退到 session 中的 comic_dir
     used_dir = (comic_dir or "").strip() or session.get("comic_dir", "")
-    archives = session.get("archives") or []
-    include = include_header.lower() in ("1", "true", "yes", "on")
-    data, filename = export_csv(csv_text or "", include, used_dir, archives)
-    return Response(
-        content=data,
+    archives, _ = _get_archives_from_token(scan_token or session.get("scan_token", ""))
+    if not archives:
+        archives = session.get("archives") or []
+    include = _truthy(include_header)
+    return StreamingResponse(
+        _iter_in_thread(export_csv_iter(csv_text or "", include, archives)),
         media_type="text/csv; charset=utf-8",
         headers={
-            "Content-Disposition": _build_content_disposition(filename),
+            "Content-Disposition": _build_content_disposition(export_csv_filename(used_dir)),
         },
     )
 
@@ -672,12 +968,13 @@ async def post_import(
     include_header: str = Form("true"),
 ):
     """上传 CSV 文件，解析后直接返回 CSV 编辑区片段（不再写入 session，避免 Cookie 过大）。"""
-    include = include_header.lower() in ("1", "true", "yes", "on")
+    include = _truthy(include_header)
     csv_text = ""
     if import_file and import_file.filename and import_file.filename.lower().endswith((".csv", ".txt")):
         try:
-            body = await import_file.read()
-            csv_text = import_csv_content(body, include)
+            # 直接从上传的临时文件解码，不先整体读成 bytes
+            await import_file.seek(0)
+            csv_text = await asyncio.to_thread(import_csv_file, import_file.file, include)
         except Exception:
             csv_text = ""
     return templates.TemplateResponse(
@@ -698,31 +995,27 @@ async def post_batch_edit(
     fr_regex: str = Form(""),
     prefix_val: str = Form(""),
     suffix_val: str = Form(""),
+    columns: list[str] = Form([]),
 ):
     """批量编辑 CSV：batch_set / find_replace / prefix / suffix / t2s / s2t。返回更新后的 CSV 区片段。"""
-    form = await request.form()
-    cols = form.getlist("columns") if "columns" in form else []
-    include = include_header.lower() in ("1", "true", "yes", "on")
-    out = csv_text
+    include = _truthy(include_header)
+    # 各批量操作都要整体解析并重写 CSV（繁简转换尤其耗时），放到线程中执行，避免阻塞事件循环
+    task: tuple | None = None
     if action == "batch_set":
-        out = batch_set(csv_text, include, cols, batch_set_val)
+        task = (batch_set, csv_text, include, columns, batch_set_val)
     elif action == "find_replace":
-        use_regex = (fr_regex or "").lower() in ("1", "true", "yes", "on")
-        out = batch_find_replace(csv_text, include, cols, fr_find, fr_replace, use_regex)
+        use_regex = _truthy(fr_regex)
+        task = (batch_find_replace, csv_text, include, columns, fr_find, fr_replace, use_regex)
     elif action == "prefix":
-        out = batch_prefix(csv_text, include, cols, prefix_val)
+        task = (batch_prefix, csv_text, include, columns, prefix_val)
     elif action == "suffix":
-        out = batch_suffix(csv_text, include, cols, suffix_val)
-    elif action == "t2s":
-        if cols:
-            out = batch_convert(csv_text, include, cols, "t2s")
+        task = (batch_suffix, csv_text, include, columns, suffix_val)
+    elif action in ("t2s", "s2t"):
+        if columns:
+            task = (batch_convert, csv_text, include, columns, action)
         else:
-            out = batch_convert_all(csv_text, include, "t2s")
-    elif action == "s2t":
-        if cols:
-            out = batch_convert(csv_text, include, cols, "s2t")
-        else:
-            out = batch_convert_all(csv_text, include, "s2t")
+            task = (batch_convert_all, csv_text, include, action)
+    out = await asyncio.to_thread(*task) if task is not None else csv_text
     return templates.TemplateResponse(
         "partials/csv_area.html",
         {"request": request, "csv_text": out, "csv_headers": CSV_HEADERS},
@@ -735,10 +1028,7 @@ async def post_batch_rename_preview(request: Request):
     预览批量改名结果，不执行实际重命名。
     返回 JSON：ok, preview: [(old_name, new_name), ...], error?
     """
-    try:
-        payload = await request.json()
-    except Exception:
-        payload = {}
+    payload = await _read_json_body(request)
 
     scan_token = str(payload.get("scan_token") or "")
     csv_text = str(payload.get("csv_text") or "")
@@ -749,14 +1039,15 @@ async def post_batch_rename_preview(request: Request):
     conflict_mode = str(payload.get("conflict_mode") or "suffix")
 
     if not rule:
-        return JSONResponse({"ok": False, "error": "规则不能为空"}, status_code=400)
+        return _JSONResponse({"ok": False, "error": "规则不能为空"}, status_code=400)
 
     archives, _ = _get_archives_from_token(scan_token)
     if not archives:
-        return JSONResponse({"ok": False, "error": "请先扫描目录"}, status_code=400)
+        return _JSONResponse({"ok": False, "error": "请先扫描目录"}, status_code=400)
 
-    include = str(include_raw).lower() in ("1", "true", "yes", "on")
-    preview_list, err = preview_rename_by_rule(
+    include = _truthy(include_raw)
+    preview_list, err = await asyncio.to_thread(
+        preview_rename_by_rule,
         archives=archives,
         csv_text=csv_text,
         include_header=include,
@@ -766,9 +1057,9 @@ async def post_batch_rename_preview(request: Request):
     )
 
     if err:
-        return JSONResponse({"ok": False, "error": err}, status_code=400)
+        return _JSONResponse({"ok": False, "error": err}, status_code=400)
 
-    return JSONResponse({"ok": True, "preview": preview_list})
+    return _JSONResponse({"ok": True, "preview": preview_list})
 
 
 @app.post("/batch-rename")
@@ -777,10 +1068,7 @@ async def post_batch_rename(request: Request):
     批量改名：根据规则重命名物理文件并更新 CSV 的 FileName 列。
     接受 JSON：csv_text, include_header, scan_token, rule, ws_replace_char, conflict_mode。
     """
-    try:
-        payload = await request.json()
-    except Exception:
-        payload = {}
+    payload = await _read_json_body(request)
 
     scan_token = str(payload.get("scan_token") or "")
     csv_text = str(payload.get("csv_text") or "")
@@ -791,20 +1079,21 @@ async def post_batch_rename(request: Request):
     conflict_mode = str(payload.get("conflict_mode") or "suffix")
 
     if not rule:
-        return JSONResponse({"ok": False, "error": "规则不能为空"}, status_code=400)
+        return _JSONResponse({"ok": False, "error": "规则不能为空"}, status_code=400)
 
     cache_entry = _SCAN_CACHE.get(scan_token) or {}
     archives, comic_dir = _get_archives_from_token(scan_token)
     if not archives:
-        return JSONResponse({"ok": False, "error": "请先扫描目录以建立压缩包顺序"}, status_code=400)
+        return _JSONResponse({"ok": False, "error": "请先扫描目录以建立压缩包顺序"}, status_code=400)
     if not ensure_archives_allowed(archives):
-        return JSONResponse({"ok": False, "error": "扫描到的压缩包路径不在允许范围内"}, status_code=400)
+        return _JSONResponse({"ok": False, "error": "扫描到的压缩包路径不在允许范围内"}, status_code=400)
 
-    include = str(include_raw).lower() in ("1", "true", "yes", "on")
+    include = _truthy(include_raw)
     if not comic_dir:
-        return JSONResponse({"ok": False, "error": "章节目录不存在"}, status_code=400)
+        return _JSONResponse({"ok": False, "error": "章节目录不存在"}, status_code=400)
 
-    new_csv_text, log, new_archives = rename_archives_by_rule(
+    new_csv_text, log, new_archives = await asyncio.to_thread(
+        rename_archives_by_rule,
         archives=archives,
         comic_dir=comic_dir,
         csv_text=csv_text,
@@ -815,28 +1104,22 @@ async def post_batch_rename(request: Request):
     )
 
     if log.startswith("错误："):
-        return JSONResponse({"ok": False, "error": log, "log": log}, status_code=400)
+        return _JSONResponse({"ok": False, "error": log, "log": log}, status_code=400)
 
-    orig_rows: dict[str, list[str]] = {}
-    try:
-        reader = csv.reader(io.StringIO(new_csv_text or ""))
-        rows = list(reader)
-        start_idx = 1 if include and rows and rows[0][:1] == ["FileName"] else 0
-        for r in rows[start_idx:]:
-            if not r:
-                continue
-            fn = (r[0] if len(r) > 0 else "").strip()
-            if not fn:
-                continue
-            orig_rows[fn] = r
-    except Exception:
-        orig_rows = {}
+    orig_rows = _build_orig_rows(new_csv_text, include)
 
     _SCAN_CACHE[scan_token] = {
         **cache_entry,
         "archives": new_archives,
         "orig_rows": orig_rows,
-        "ts": time.time(),
     }
 
-    return JSONResponse({"ok": True, "csv_text": new_csv_text, "log": log})
+    return _JSONResponse({"ok": True, "csv_text": new_csv_text, "log": log})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # 扫描结果缓存、扫描任务均保存在进程内存中，只能单进程运行（不要开多个 worker）
+    # 事件循环与 HTTP 解析器保持 auto：已安装 uvloop / httptools 时自动启用，Windows 等平台回退到 asyncio 默认实现
+    uvicorn.run("app:app", host="0.0.0.0", port=8000)
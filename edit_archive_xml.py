@@ -4,11 +4,17 @@
 """
 import csv
 import io
+import itertools
 import os
 import re
+import shutil
+import struct
 import tempfile
 import zipfile
-from typing import Any
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, BinaryIO, Iterator
 
 from lxml import etree
 
@@ -24,7 +30,107 @@ from update_archives_with_xml import list_archives
 # ---------------------------------------------------------------------------
 
 
+# ZIP 本地文件头：固定 30 字节，文件名长度与扩展字段长度位于偏移 26、28
+_LOCAL_HEADER_SIG = b"PK\x03\x04"
+_LOCAL_HEADER_SIZE = 30
+_EOCD_SIG = b"PK\x05\x06"
+_EOCD_SIZE = 22
+_ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+_CENTRAL_DIR_SIG = b"PK\x01\x02"
+_CENTRAL_DIR_SIZE = 46
+_COMICINFO_LOWER = b"comicinfo.xml"
+
+
+class _FastZipUnsupported(Exception):
+    """快速读取路径无法处理（ZIP64、加密、非常规压缩方式或结构异常），改用 zipfile 读取。"""
+
+
+def _read_comicinfo_fast(archive_path: str) -> bytes | None:
+    """
+    只解析 ZIP 中央目录的原始字节找 ComicInfo.xml，并只解压这一个成员；
+    不为每个图片成员构造 ZipInfo 对象（这部分是纯 Python、持 GIL 的开销）。
+    选取规则与 read_xml_from_archive 的 zipfile 路径一致；无法处理的情况抛出 _FastZipUnsupported。
+    """
+    with open(archive_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        tail_size = min(file_size, _EOCD_SIZE + 0xFFFF)
+        f.seek(file_size - tail_size)
+        tail = f.read(tail_size)
+        pos = tail.rfind(_EOCD_SIG)
+        if pos < 0 or tail_size - pos < _EOCD_SIZE:
+            raise _FastZipUnsupported
+        disk, cd_disk, cd_size, cd_offset = struct.unpack_from("<2H4x2L", tail, pos + 4)
+        if disk or cd_disk or 0xFFFFFFFF in (cd_size, cd_offset):
+            raise _FastZipUnsupported
+        if pos >= 20 and tail[pos - 20:pos - 16] == _ZIP64_LOCATOR_SIG:
+            raise _FastZipUnsupported
+        eocd_pos = file_size - tail_size + pos
+        # 与 zipfile 相同：允许压缩包前面拼接了其他数据（如自解压头）
+        concat = eocd_pos - cd_size - cd_offset
+        if concat < 0:
+            raise _FastZipUnsupported
+        f.seek(cd_offset + concat)
+        cd = f.read(cd_size)
+        if len(cd) != cd_size:
+            raise _FastZipUnsupported
+
+        # 收集名字为 ComicInfo.xml（忽略大小写）的条目：
+        # (文件名, 原始文件名字节, flags, method, crc, csize, usize, 本地头偏移)
+        candidates: list[tuple[str, bytes, int, int, int, int, int, int]] = []
+        p = 0
+        # 与 zipfile 相同，按中央目录字节数而非记录数遍历
+        while p < cd_size:
+            if cd[p:p + 4] != _CENTRAL_DIR_SIG or p + _CENTRAL_DIR_SIZE > cd_size:
+                raise _FastZipUnsupported
+            flags, method = struct.unpack_from("<2H", cd, p + 8)
+            crc, csize, usize, name_len, extra_len, comment_len = struct.unpack_from("<3L3H", cd, p + 16)
+            (offset,) = struct.unpack_from("<L", cd, p + 42)
+            raw_name = cd[p + _CENTRAL_DIR_SIZE:p + _CENTRAL_DIR_SIZE + name_len]
+            # zipfile 会截掉文件名中 NUL 之后的部分
+            short_name = raw_name.split(b"\0", 1)[0]
+            if short_name.lower() == _COMICINFO_LOWER:
+                name = short_name.decode("utf-8" if flags & 0x800 else "cp437")
+                candidates.append((name, raw_name, flags, method, crc, csize, usize, offset))
+            p += _CENTRAL_DIR_SIZE + name_len + extra_len + comment_len
+
+        if not candidates:
+            return None
+        target = "ComicInfo.xml" if any(c[0] == "ComicInfo.xml" for c in candidates) else candidates[0][0]
+        # zipfile 按名读取时，重名条目以中央目录中最后一个为准
+        _, raw_name, flags, method, crc, csize, usize, offset = [c for c in candidates if c[0] == target][-1]
+        if flags & 0x1 or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or 0xFFFFFFFF in (csize, usize):
+            raise _FastZipUnsupported
+
+        f.seek(offset + concat)
+        header = f.read(_LOCAL_HEADER_SIZE)
+        if len(header) != _LOCAL_HEADER_SIZE or header[:4] != _LOCAL_HEADER_SIG:
+            raise _FastZipUnsupported
+        name_len, extra_len = struct.unpack_from("<HH", header, 26)
+        # zipfile 要求本地头文件名与中央目录一致
+        if f.read(name_len) != raw_name:
+            raise _FastZipUnsupported
+        f.seek(extra_len, os.SEEK_CUR)
+        data = f.read(csize)
+        if len(data) != csize:
+            raise _FastZipUnsupported
+    if method == zipfile.ZIP_DEFLATED:
+        data = zlib.decompress(data, -15)
+    if len(data) != usize or zlib.crc32(data) != crc:
+        raise _FastZipUnsupported
+    return data
+
+
 def read_xml_from_archive(archive_path: str) -> bytes | None:
+    try:
+        return _read_comicinfo_fast(archive_path)
+    except _FastZipUnsupported:
+        pass
+    except OSError:
+        return None
+    except Exception:  # noqa: BLE001
+        # zlib 解压失败等：交给 zipfile 判定
+        pass
     try:
         with zipfile.ZipFile(archive_path, "r") as zf:
             target_name = None
@@ -44,43 +150,6 @@ def read_xml_from_archive(archive_path: str) -> bytes | None:
         return None
 
 
-def parse_xml_fields(xml_bytes: bytes) -> dict[str, str]:
-    try:
-        root = etree.fromstring(xml_bytes)
-
-        def get(tag: str) -> str:
-            elem = root.find(tag)
-            return (elem.text or "").strip() if elem is not None and elem.text else ""
-
-        return {
-            "Title": get("Title"),
-            "Series": get("Series"),
-            "Number": get("Number"),
-            "Summary": get("Summary"),
-            "Writer": get("Writer"),
-            "Genre": get("Genre"),
-            "Web": get("Web"),
-            "PublishingStatusTachiyomi": get("PublishingStatusTachiyomi"),
-            "SourceMihon": get("SourceMihon"),
-            "PublicationYear": get("PublicationYear"),
-            "PublicationMonth": get("PublicationMonth"),
-        }
-    except Exception:
-        return {
-            "Title": "",
-            "Series": "",
-            "Number": "",
-            "Summary": "",
-            "Writer": "",
-            "Genre": "",
-            "Web": "",
-            "PublishingStatusTachiyomi": "",
-            "SourceMihon": "",
-            "PublicationYear": "",
-            "PublicationMonth": "",
-        }
-
-
 XML_FIELD_TAGS = [
     "Title",
     "Series",
@@ -94,9 +163,44 @@ XML_FIELD_TAGS = [
     "PublicationYear",
     "PublicationMonth",
 ]
+_XML_FIELD_SET = frozenset(XML_FIELD_TAGS)
+
+
+def parse_xml_fields(xml_bytes: bytes) -> dict[str, str]:
+    """单遍遍历根节点的直接子元素取出各字段；同名标签取第一个（与 root.find 一致），缺失为空串。"""
+    fields = dict.fromkeys(XML_FIELD_TAGS, "")
+    try:
+        root = etree.fromstring(xml_bytes)
+    except Exception:
+        return fields
+    seen: set[str] = set()
+    for elem in root:
+        tag = elem.tag
+        if tag in _XML_FIELD_SET and tag not in seen:
+            seen.add(tag)
+            text = elem.text
+            if text:
+                fields[tag] = text.strip()
+    return fields
+
+
+# 固定结构的 ComicInfo.xml 模板，与下方 lxml pretty_print 的输出逐字节一致
+_XML_TEMPLATE = (
+    "<?xml version='1.0' encoding='UTF-8'?>\n<ComicInfo>\n"
+    + "".join(f"  <{tag}>{{{tag}}}</{tag}>\n" for tag in XML_FIELD_TAGS)
+    + "</ComicInfo>\n"
+)
+# 含这些字符（\r 需转成字符引用，其余为 XML 不允许的字符）时交给 lxml 处理，保持原有的转义/报错行为
+_XML_SLOW_CHARS_RE = re.compile(r"[\x00-\x08\x0b-\x1f\ud800-\udfff\ufffe\uffff]")
 
 
 def build_xml_from_fields(fields: dict[str, Any]) -> bytes:
+    values = {tag: (fields.get(tag) or "").strip() for tag in XML_FIELD_TAGS}
+    if all(isinstance(v, str) and not _XML_SLOW_CHARS_RE.search(v) for v in values.values()):
+        return _XML_TEMPLATE.format_map({
+            tag: v.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            for tag, v in values.items()
+        }).encode("utf-8")
     root = etree.Element("ComicInfo")
     for tag in XML_FIELD_TAGS:
         val = (fields.get(tag) or "").strip()
@@ -108,19 +212,78 @@ def build_xml_from_fields(fields: dict[str, Any]) -> bytes:
     return etree.tostring(tree, pretty_print=True, xml_declaration=True, encoding="UTF-8")
 
 
+# 复制压缩包成员时的分块大小：逐块复制，内存占用与图片大小无关
+_COPY_CHUNK = 1024 * 1024
+
+
+def _copy_member_raw(zf: zipfile.ZipFile, zfw: zipfile.ZipFile, info: zipfile.ZipInfo) -> bool:
+    """
+    将成员的已压缩数据原样复制到 zfw，不解压、不重新压缩（图片成员占绝大部分体积）。
+    加密、ZIP64 或本地文件头异常时返回 False，由调用方回退为解压后重新写入。
+    依赖 ZipFile 的 fp/filelist/NameToInfo/start_dir 内部属性（写入流程与 ZipFile.open 的写模式一致）。
+    """
+    if info.flag_bits & 0x1:
+        return False
+    limit = zipfile.ZIP64_LIMIT
+    if info.file_size >= limit or info.compress_size >= limit or info.header_offset >= limit:
+        return False
+
+    src = zf.fp
+    src.seek(info.header_offset)
+    header = src.read(_LOCAL_HEADER_SIZE)
+    if len(header) != _LOCAL_HEADER_SIZE or header[:4] != _LOCAL_HEADER_SIG:
+        return False
+    name_len, extra_len = struct.unpack_from("<HH", header, 26)
+    data_offset = info.header_offset + _LOCAL_HEADER_SIZE + name_len + extra_len
+
+    dst = zfw.fp
+    if dst.tell() >= limit:
+        return False
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    for attr in (
+        "compress_type", "comment", "extra", "create_system", "create_version",
+        "extract_version", "volume", "internal_attr", "external_attr",
+        "CRC", "compress_size", "file_size",
+    ):
+        setattr(zinfo, attr, getattr(info, attr))
+    # 尺寸与 CRC 已写进本地文件头，不再需要数据描述符
+    zinfo.flag_bits = info.flag_bits & ~0x08
+    zinfo.header_offset = dst.tell()
+
+    src.seek(data_offset)
+    dst.write(zinfo.FileHeader(False))
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = src.read(min(_COPY_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"成员数据被截断: {info.filename}")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+    zfw.filelist.append(zinfo)
+    zfw.NameToInfo[zinfo.filename] = zinfo
+    zfw.start_dir = dst.tell()
+    return True
+
+
 def write_xml_to_archive(archive_path: str, xml_bytes: bytes) -> bool:
     try:
         with zipfile.ZipFile(archive_path, "r") as zf:
             dir_name = os.path.dirname(archive_path)
             fd, tmp_path = tempfile.mkstemp(suffix=".zip", prefix="tmp_edit_", dir=dir_name)
-            os.close(fd)
             try:
-                with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zfw:
+                # 直接复用 mkstemp 的描述符，并用大缓冲合并成员头与数据的小块写入
+                with (
+                    os.fdopen(fd, "wb", buffering=_COPY_CHUNK) as out,
+                    zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zfw,
+                ):
                     for info in zf.infolist():
                         if info.filename.lower() == "comicinfo.xml":
                             continue
-                        data = zf.read(info.filename)
-                        zfw.writestr(info, data)
+                        if _copy_member_raw(zf, zfw, info):
+                            continue
+                        with zf.open(info) as src, zfw.open(info, "w") as dst:
+                            shutil.copyfileobj(src, dst, _COPY_CHUNK)
                     zfw.writestr("ComicInfo.xml", xml_bytes)
                 os.replace(tmp_path, archive_path)
                 return True
@@ -156,34 +319,66 @@ CSV_HEADERS = [
 ALL_MARK = "【选择全部】"
 
 
+def _is_csv_header(row: list[str]) -> bool:
+    """判断一行是否为标准表头（忽略各列首尾空白）；常见的完全一致情况不必逐列 strip。"""
+    return row == CSV_HEADERS or (
+        len(row) == len(CSV_HEADERS) and [c.strip() for c in row] == CSV_HEADERS
+    )
+
+
+# csv.writer（excel 方言、QUOTE_MINIMAL）仅在字段含逗号、双引号或换行时才加引号
+_CSV_QUOTE_CHARS_RE = re.compile(r'["\r\n]')
+
+
+def _write_csv_row(out: io.StringIO, writer: Any, row: list[str]) -> None:
+    """
+    写入一行 CSV：绝大多数行的字段无需加引号，直接以逗号拼接写入，省去 csv.writer 的逐字段处理；
+    否则交给 writer.writerow。两条路径输出一致。row 须全部为 str。
+    """
+    line = ",".join(row)
+    if len(row) > 1 and line.count(",") == len(row) - 1 and not _CSV_QUOTE_CHARS_RE.search(line):
+        out.write(line + "\r\n")
+    else:
+        writer.writerow(row)
+
+
 def list_dirs_with_archives(base_path: str) -> list[str]:
     """递归扫描 base_path，返回包含 .zip/.cbz 的子目录相对路径列表（用于下拉选择）。"""
     if not base_path or not os.path.isdir(base_path):
         return []
 
-    def scan(path: str) -> list[str]:
-        entries: list[str] = []
+    def list_entries(path: str) -> list[os.DirEntry] | None:
         try:
-            for name in sorted(os.listdir(path)):
-                full_path = os.path.join(path, name)
-                if os.path.isdir(full_path):
-                    has_archive = False
-                    try:
-                        for sub_name in os.listdir(full_path):
-                            if sub_name.lower().endswith((".zip", ".cbz")):
-                                has_archive = True
-                                break
-                    except Exception:
-                        continue
-                    if has_archive:
-                        entries.append(os.path.relpath(full_path, base_path))
-                    else:
-                        entries.extend(scan(full_path))
-        except Exception:
-            pass
-        return entries
+            with os.scandir(path) as it:
+                return list(it)
+        except OSError:
+            return None
+
+    def is_dir(entry: os.DirEntry) -> bool:
+        try:
+            return entry.is_dir()
+        except OSError:
+            return False
+
+    # 每个目录只 scandir 一次：同一份列表既用于判断是否含压缩包，也用于继续向下递归；
+    # DirEntry.is_dir() 多数情况下无需额外 stat
+    def scan(entries: list[os.DirEntry], rel_prefix: str) -> list[str]:
+        result: list[str] = []
+        for entry in sorted((e for e in entries if is_dir(e)), key=lambda e: e.name):
+            sub_entries = list_entries(entry.path)
+            if sub_entries is None:
+                continue
+            rel = rel_prefix + entry.name
+            if any(e.name.lower().endswith((".zip", ".cbz")) for e in sub_entries):
+                result.append(rel)
+            else:
+                result.extend(scan(sub_entries, rel + os.sep))
+        return result
+
+    return scan(list_entries(base_path) or [], "")
+
 
-    return scan(base_path)
+_NAME_NUM_RE = re.compile(r"^(\D*)(\d+)?")
 
 
 def sort_archives(archives: list[str], sort_mode: str) -> list[str]:
@@ -192,12 +387,11 @@ def sort_archives(archives: list[str], sort_mode: str) -> list[str]:
         def key_func(path: str):
             name = os.path.basename(path)
             base = os.path.splitext(name)[0]
-            m = re.match(r"^(\D*)(\d+)?", base)
-            prefix = (m.group(1) if m else "").lower()
-            num = int(m.group(2)) if m and m.group(2) else None
-            has_num_flag = 0 if num is not None else 1
-            num_val = num if num is not None else 0
-            return (prefix, has_num_flag, num_val, name.lower())
+            # 该正则总能匹配（两组均可为空），一次 groups() 取出前缀与数字
+            prefix, digits = _NAME_NUM_RE.match(base).groups()
+            if digits:
+                return (prefix.lower(), 0, int(digits), name.lower())
+            return (prefix.lower(), 1, 0, name.lower())
         return sorted(archives, key=key_func)
     if sort_mode == "按字母顺序":
         return sorted(archives, key=lambda p: os.path.basename(p).lower())
@@ -230,71 +424,123 @@ def _sort_by_number_field(archives: list[str], cached_fields: dict[str, dict]) -
     return sorted(archives, key=key_num)
 
 
-def scan_archives(
+# 扫描时并发读取 ComicInfo.xml 的线程数（I/O 密集）；可用环境变量 MANGATAG_SCAN_WORKERS 调整
+try:
+    SCAN_WORKERS = max(1, int(os.environ.get("MANGATAG_SCAN_WORKERS", "16")))
+except ValueError:
+    SCAN_WORKERS = 16
+
+
+def _load_archive_fields(archive_path: str) -> dict[str, str] | None:
+    xml_bytes = read_xml_from_archive(archive_path)
+    return parse_xml_fields(xml_bytes) if xml_bytes is not None else None
+
+
+@lru_cache(maxsize=8192)
+def _load_archive_fields_cached(
+    archive_path: str, st_ino: int, st_mtime_ns: int, st_size: int
+) -> dict[str, str] | None:
+    """以 (路径, inode, mtime, 大小) 为键缓存解析结果；压缩包被重写（os.replace）后键随之变化，自动失效。"""
+    return _load_archive_fields(archive_path)
+
+
+def _read_archive_fields(archive_path: str) -> dict[str, str] | Exception | None:
+    """
+    读取并解析单个压缩包的 ComicInfo.xml；无 XML 返回 None，出错时返回异常对象由调用方记录。
+    重复扫描、扫描后导出等未改动的压缩包直接命中缓存；返回的字典为共享对象，调用方只读不改。
+    """
+    try:
+        try:
+            st = os.stat(archive_path)
+        except OSError:
+            return _load_archive_fields(archive_path)
+        return _load_archive_fields_cached(archive_path, st.st_ino, st.st_mtime_ns, st.st_size)
+    except Exception as e:  # noqa: BLE001
+        return e
+
+
+def _iter_fields_concurrently(archives: list[str]) -> Iterator[dict[str, str] | Exception | None]:
+    """用有界线程池并发读取各压缩包的字段，按 archives 顺序逐个产出结果。线程数即同时打开的文件数上限。"""
+    workers = min(SCAN_WORKERS, len(archives))
+    if workers <= 1:
+        for ap in archives:
+            yield _read_archive_fields(ap)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        yield from ex.map(_read_archive_fields, archives)
+
+
+def scan_archives_iter(
     comic_dir: str,
     include_header: bool,
     sort_mode: str,
-) -> tuple[str, str, list[str]]:
+) -> Iterator[tuple[str, Any]]:
     """
-    扫描目录中的 .cbz/.zip，读取 ComicInfo.xml 生成 CSV。
-    返回 (csv_text, scan_log, archives_full_paths)。
+    扫描目录中的 .cbz/.zip，读取 ComicInfo.xml 生成 CSV：读取过程中逐条产出 ("log", 日志行)，
+    最后产出 ("result", (csv_text, archives_full_paths, orig_rows))。
+    orig_rows 为 FileName -> 数据行 的映射，即「扫描时」的原始行，供保存时判断是否改动。
+    便于边扫描边推送进度，并让多个请求共享同一次扫描。
     """
-    logs: list[str] = []
     if not comic_dir or not os.path.isdir(comic_dir):
-        return ("", "错误：目录不存在或为空", [])
+        yield ("log", "错误：目录不存在或为空")
+        yield ("result", ("", [], {}))
+        return
 
     archives = list_archives(comic_dir)
-    cached_fields: dict[str, dict] = {}
 
+    # 每个压缩包只读一次 ComicInfo.xml，并发读取。
+    # 按 Number 排序需先读完全部再排序；其余模式先排序，再按顺序边读边输出进度。
     if sort_mode == "按Number列数字大小排序":
-        for ap in archives:
-            try:
-                xml_bytes = read_xml_from_archive(ap)
-                if xml_bytes is not None:
-                    cached_fields[ap] = parse_xml_fields(xml_bytes)
-            except Exception:
-                pass
-        archives = _sort_by_number_field(archives, cached_fields)
+        read_results = dict(zip(archives, _iter_fields_concurrently(archives)))
+        archives = _sort_by_number_field(
+            archives, {ap: f for ap, f in read_results.items() if isinstance(f, dict)}
+        )
+        results = (read_results[ap] for ap in archives)
     else:
         archives = sort_archives(archives, sort_mode)
+        results = _iter_fields_concurrently(archives)
 
-    logs.append(f"发现压缩包：{len(archives)} 个，排序：{sort_mode}")
+    yield ("log", f"发现压缩包：{len(archives)} 个，排序：{sort_mode}")
     if not archives:
         # 额外输出当前目录下前若干条内容，便于诊断“看起来有文件但程序认为没有”的情况
         try:
             entries = sorted(os.listdir(comic_dir))
             preview = entries[:50]
-            logs.append("调试：未发现任何 .zip/.cbz 文件。当前目录前若干项：")
+            yield ("log", "调试：未发现任何 .zip/.cbz 文件。当前目录前若干项：")
             for name in preview:
                 full = os.path.join(comic_dir, name)
                 typ = "dir" if os.path.isdir(full) else "file"
                 ext = os.path.splitext(name)[1]
-                logs.append(f"  [{typ}] {name} (ext={ext})")
+                yield ("log", f"  [{typ}] {name} (ext={ext})")
             if len(entries) > len(preview):
-                logs.append(f"  ... 共 {len(entries)} 项，仅显示前 {len(preview)} 项。")
+                yield ("log", f"  ... 共 {len(entries)} 项，仅显示前 {len(preview)} 项。")
         except Exception as e:  # noqa: BLE001
-            logs.append(f"调试：列举目录内容失败：{e!r}")
+            yield ("log", f"调试：列举目录内容失败：{e!r}")
 
     output = io.StringIO()
     writer = csv.writer(output)
     if include_header:
         writer.writerow(CSV_HEADERS)
+    orig_rows: dict[str, list[str]] = {}
+
+    def write_row(row: list[str]) -> None:
+        _write_csv_row(output, writer, row)
+        fn = row[0].strip()
+        if fn:
+            orig_rows[fn] = row
 
-    for i, ap in enumerate(archives, start=1):
+    for i, (ap, fields) in enumerate(zip(archives, results), start=1):
         base_name = os.path.basename(ap)
         try:
-            fields = cached_fields.get(ap)
-            if fields is None:
-                xml_bytes = read_xml_from_archive(ap)
-                if xml_bytes is not None:
-                    fields = parse_xml_fields(xml_bytes)
+            if isinstance(fields, Exception):
+                raise fields
             if fields is None:
                 base = os.path.splitext(base_name)[0]
                 series = os.path.basename(os.path.dirname(ap)) if os.path.dirname(ap) else ""
-                writer.writerow([base_name, base, series, "", "", "", "", "", "", "", "", ""])
-                logs.append(f"[{i}/{len(archives)}] 无 ComicInfo.xml -> 预填 Title='{base}', Series='{series}'")
+                write_row([base_name, base, series, "", "", "", "", "", "", "", "", ""])
+                yield ("log", f"[{i}/{len(archives)}] 无 ComicInfo.xml -> 预填 Title='{base}', Series='{series}'")
             else:
-                writer.writerow([
+                write_row([
                     base_name,
                     fields.get("Title", ""),
                     fields.get("Series", ""),
@@ -308,28 +554,32 @@ def scan_archives(
                     fields.get("PublicationYear", ""),
                     fields.get("PublicationMonth", ""),
                 ])
-                logs.append(f"[{i}/{len(archives)}] 读取 ComicInfo.xml 成功 -> {base_name}")
+                yield ("log", f"[{i}/{len(archives)}] 读取 ComicInfo.xml 成功 -> {base_name}")
         except Exception as e:
-            writer.writerow([os.path.basename(ap)] + [""] * 11)
-            logs.append(f"[{i}/{len(archives)}] 读取失败 -> {base_name}: {e}")
-
-    return (output.getvalue(), "\n".join(logs), archives)
+            write_row([os.path.basename(ap)] + [""] * 11)
+            yield ("log", f"[{i}/{len(archives)}] 读取失败 -> {base_name}: {e}")
 
+    yield ("result", (output.getvalue(), archives, orig_rows))
 
-def strip_optional_header(rows: list[list[str]], include_header: bool) -> list[list[str]]:
-    if not rows:
-        return rows
-    first_row = [c.strip() for c in rows[0]] if rows else []
-    if (include_header and first_row[:1] == ["FileName"]) or (rows and first_row[:1] == ["FileName"]):
-        return rows[1:]
-    return rows
 
-
-def prune_trailing_empty_rows(rows: list[list[str]]) -> list[list[str]]:
-    pruned = list(rows)
-    while pruned and all((c is None or str(c).strip() == "") for c in pruned[-1]):
-        pruned.pop()
-    return pruned
+def build_row_map(csv_text: str) -> tuple[dict[str, list[str]], set[str]]:
+    """
+    单遍解析 CSV，返回 (FileName -> 行, 重复文件名集合)，不先物化全部行。
+    首行首列为 FileName 时视为表头跳过；空行、文件名为空的行（含末尾空行）忽略。
+    """
+    row_map: dict[str, list[str]] = {}
+    duplicates: set[str] = set()
+    for i, r in enumerate(csv.reader(io.StringIO(csv_text))):
+        if not r:
+            continue
+        fn = r[0].strip()
+        if not fn or (i == 0 and fn == "FileName"):
+            continue
+        if fn in row_map:
+            duplicates.add(fn)
+        else:
+            row_map[fn] = r
+    return row_map, duplicates
 
 
 def _fields_equal(a: dict[str, Any], b: dict[str, Any]) -> bool:
@@ -340,6 +590,94 @@ def _fields_equal(a: dict[str, Any], b: dict[str, Any]) -> bool:
     return True
 
 
+# 保存时并发处理压缩包的线程数（重写 zip 以 I/O 与 zlib 压缩为主，后者会释放 GIL）；
+# 可用环境变量 MANGATAG_SAVE_WORKERS 调整，默认 min(16, CPU 数 × 2)
+_SAVE_WORKERS_DEFAULT = min(16, (os.cpu_count() or 1) * 2)
+try:
+    SAVE_WORKERS = max(1, int(os.environ.get("MANGATAG_SAVE_WORKERS") or _SAVE_WORKERS_DEFAULT))
+except ValueError:
+    SAVE_WORKERS = _SAVE_WORKERS_DEFAULT
+
+
+def _save_one_archive(
+    ap: str,
+    name: str,
+    row: list[str] | None,
+    original_rows: dict[str, list[str]] | None,
+) -> str:
+    """按 CSV 行写回单个压缩包（name 为其文件名）的 ComicInfo.xml，返回该压缩包的日志内容（不含序号）。"""
+    if row is None:
+        return f"跳过：CSV 未提供对应行 -> {name}"
+    if len(row) < 12:
+        row = row + [""] * (12 - len(row))
+
+    # 若提供了扫描时的原始行，且当前行与原始行完全一致，则视为未改动，跳过写入
+    if original_rows is not None:
+        orig = original_rows.get(name)
+        if orig is not None:
+            # 对齐长度后比较，忽略尾部缺失列带来的差异
+            max_len = max(len(row), len(orig))
+            cur = row + [""] * (max_len - len(row))
+            ori = orig + [""] * (max_len - len(orig))
+            if cur == ori:
+                return f"跳过(与扫描时内容一致): {name}"
+
+    new_fields = {
+        "Title": row[1],
+        "Series": row[2],
+        "Number": row[3],
+        "Summary": row[4],
+        "Writer": row[5],
+        "Genre": row[6],
+        "Web": row[7],
+        "PublishingStatusTachiyomi": row[8],
+        "SourceMihon": row[9],
+        "PublicationYear": row[10],
+        "PublicationMonth": row[11],
+    }
+    # 扫描时已解析过的压缩包直接命中缓存，未改动时不必再打开压缩包；需要写入时只由 write_xml_to_archive 打开一次
+    old_fields = _read_archive_fields(ap)
+    if isinstance(old_fields, dict) and _fields_equal(old_fields, new_fields):
+        return f"跳过(无改动): {name}"
+    xml_bytes = build_xml_from_fields(new_fields)
+    if write_xml_to_archive(ap, xml_bytes):
+        return f"已保存: {name}"
+    return f"失败: {name}"
+
+
+def _iter_save_results(
+    archives: list[str],
+    archive_names: list[str],
+    row_map: dict[str, list[str]],
+    original_rows: dict[str, list[str]] | None,
+) -> Iterator[str]:
+    """
+    用有界线程池并发写回各压缩包，按 archives 原顺序逐条产出日志（前面的未完成时后面的先等待）。
+    迭代提前结束（如客户端断开）时取消尚未开始的任务。
+    """
+    def task(ap: str, name: str) -> str:
+        return _save_one_archive(ap, name, row_map.get(name), original_rows)
+
+    workers = min(SAVE_WORKERS, len(archives))
+    if workers <= 1:
+        for ap, name in zip(archives, archive_names):
+            yield task(ap, name)
+        return
+    ex = ThreadPoolExecutor(max_workers=workers)
+    try:
+        yield from ex.map(task, archives, archive_names)
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+def _csv_coverage(archive_names: list[str], row_map: dict[str, list[str]]) -> tuple[list[str], list[str]]:
+    """返回 (CSV 缺少的文件名, CSV 多出的文件名)，均已排序；直接与 row_map 的键比较，不另建集合。"""
+    set_archives = set(archive_names)
+    missing = sorted(set_archives.difference(row_map))
+    extra = sorted(name for name in row_map if name not in set_archives)
+    return missing, extra
+
+
 def save_archives(
     archives: list[str],
     csv_text: str,
@@ -357,32 +695,13 @@ def save_archives(
     if not archives:
         return ("请先扫描目录以建立压缩包顺序", False)
 
-    reader = csv.reader(io.StringIO(csv_text))
-    rows = list(reader)
-    rows = strip_optional_header(rows, include_header)
-    rows = prune_trailing_empty_rows(rows)
-
-    row_map: dict[str, list[str]] = {}
-    duplicates: set[str] = set()
-    for r in rows:
-        if not r:
-            continue
-        fn = (r[0] if len(r) > 0 else "").strip()
-        if not fn:
-            continue
-        if fn in row_map:
-            duplicates.add(fn)
-        else:
-            row_map[fn] = r
+    row_map, duplicates = build_row_map(csv_text)
 
     if duplicates:
         return (f"CSV 文件名重复：{len(duplicates)} 个，例如 {sorted(duplicates)[:3]} ...。已取消保存。", False)
 
     archive_names = [os.path.basename(a) for a in archives]
-    set_archives = set(archive_names)
-    set_csv = set(row_map.keys())
-    missing = sorted(set_archives - set_csv)
-    extra = sorted(set_csv - set_archives)
+    missing, extra = _csv_coverage(archive_names, row_map)
 
     if check_count:
         if missing:
@@ -396,52 +715,8 @@ def save_archives(
             logs.append(f"提示：CSV 包含 {len(extra)} 个额外行（非扫描文件），将忽略。如：{', '.join(extra[:3])} ...")
 
     total = len(archives)
-    for idx, ap in enumerate(archives):
-        name = os.path.basename(ap)
-        row = row_map.get(name)
-        if row is None:
-            logs.append(f"[{idx+1}/{total}] 跳过：CSV 未提供对应行 -> {name}")
-            continue
-        if len(row) < 12:
-            row = row + [""] * (12 - len(row))
-
-        # 若提供了扫描时的原始行，且当前行与原始行完全一致，则视为未改动，跳过写入
-        if original_rows is not None:
-            orig = original_rows.get(name)
-            if orig is not None:
-                # 对齐长度后比较，忽略尾部缺失列带来的差异
-                max_len = max(len(row), len(orig))
-                cur = row + [""] * (max_len - len(row))
-                ori = orig + [""] * (max_len - len(orig))
-                if cur == ori:
-                    logs.append(f"[{idx+1}/{total}] 跳过(与扫描时内容一致): {name}")
-                    continue
-
-        new_fields = {
-            "Title": row[1],
-            "Series": row[2],
-            "Number": row[3],
-            "Summary": row[4],
-            "Writer": row[5],
-            "Genre": row[6],
-            "Web": row[7],
-            "PublishingStatusTachiyomi": row[8],
-            "SourceMihon": row[9],
-            "PublicationYear": row[10],
-            "PublicationMonth": row[11],
-        }
-        old_xml = read_xml_from_archive(ap)
-        if old_xml is not None:
-            old_fields = parse_xml_fields(old_xml)
-            if _fields_equal(old_fields, new_fields):
-                logs.append(f"[{idx+1}/{total}] 跳过(无改动): {name}")
-                continue
-        xml_bytes = build_xml_from_fields(new_fields)
-        ok = write_xml_to_archive(ap, xml_bytes)
-        if ok:
-            logs.append(f"[{idx+1}/{total}] 已保存: {name}")
-        else:
-            logs.append(f"[{idx+1}/{total}] 失败: {name}")
+    for idx, msg in enumerate(_iter_save_results(archives, archive_names, row_map, original_rows), start=1):
+        logs.append(f"[{idx}/{total}] {msg}")
 
     logs.append("保存完成")
     return ("\n".join(logs), True)
@@ -465,33 +740,14 @@ def save_archives_streaming(
         yield "请先扫描目录以建立压缩包顺序"
         return
 
-    reader = csv.reader(io.StringIO(csv_text))
-    rows = list(reader)
-    rows = strip_optional_header(rows, include_header)
-    rows = prune_trailing_empty_rows(rows)
-
-    row_map: dict[str, list[str]] = {}
-    duplicates: set[str] = set()
-    for r in rows:
-        if not r:
-            continue
-        fn = (r[0] if len(r) > 0 else "").strip()
-        if not fn:
-            continue
-        if fn in row_map:
-            duplicates.add(fn)
-        else:
-            row_map[fn] = r
+    row_map, duplicates = build_row_map(csv_text)
 
     if duplicates:
         yield f"CSV 文件名重复：{len(duplicates)} 个，例如 {sorted(duplicates)[:3]} ...。已取消保存。"
         return
 
     archive_names = [os.path.basename(a) for a in archives]
-    set_archives = set(archive_names)
-    set_csv = set(row_map.keys())
-    missing = sorted(set_archives - set_csv)
-    extra = sorted(set_csv - set_archives)
+    missing, extra = _csv_coverage(archive_names, row_map)
 
     if check_count:
         if missing:
@@ -507,132 +763,117 @@ def save_archives_streaming(
             yield f"提示：CSV 包含 {len(extra)} 个额外行（非扫描文件），将忽略。如：{', '.join(extra[:3])} ..."
 
     total = len(archives)
-    for idx, ap in enumerate(archives):
-        name = os.path.basename(ap)
-        row = row_map.get(name)
-        if row is None:
-            yield f"[{idx+1}/{total}] 跳过：CSV 未提供对应行 -> {name}"
-            continue
-        if len(row) < 12:
-            row = row + [""] * (12 - len(row))
-
-        # 若提供了扫描时的原始行，且当前行与原始行完全一致，则视为未改动，跳过写入
-        if original_rows is not None:
-            orig = original_rows.get(name)
-            if orig is not None:
-                max_len = max(len(row), len(orig))
-                cur = row + [""] * (max_len - len(row))
-                ori = orig + [""] * (max_len - len(orig))
-                if cur == ori:
-                    yield f"[{idx+1}/{total}] 跳过(与扫描时内容一致): {name}"
-                    continue
-        new_fields = {
-            "Title": row[1],
-            "Series": row[2],
-            "Number": row[3],
-            "Summary": row[4],
-            "Writer": row[5],
-            "Genre": row[6],
-            "Web": row[7],
-            "PublishingStatusTachiyomi": row[8],
-            "SourceMihon": row[9],
-            "PublicationYear": row[10],
-            "PublicationMonth": row[11],
-        }
-        old_xml = read_xml_from_archive(ap)
-        if old_xml is not None:
-            old_fields = parse_xml_fields(old_xml)
-            if _fields_equal(old_fields, new_fields):
-                yield f"[{idx+1}/{total}] 跳过(无改动): {name}"
-                continue
-        xml_bytes = build_xml_from_fields(new_fields)
-        ok = write_xml_to_archive(ap, xml_bytes)
-        if ok:
-            yield f"[{idx+1}/{total}] 已保存: {name}"
-        else:
-            yield f"[{idx+1}/{total}] 失败: {name}"
+    for idx, msg in enumerate(_iter_save_results(archives, archive_names, row_map, original_rows), start=1):
+        yield f"[{idx}/{total}] {msg}"
 
     yield "保存完成"
 
 
-def export_csv(
+def _export_archive_row(ap: str, fields: dict[str, str] | Exception | None) -> list[str]:
+    """由 _read_archive_fields 的结果生成导出用的 CSV 行；无 XML 时按文件名预填，出错时仅保留文件名。"""
+    base_name = os.path.basename(ap)
+    if isinstance(fields, Exception):
+        return [base_name] + [""] * 11
+    if fields is None:
+        base = os.path.splitext(base_name)[0]
+        series = os.path.basename(os.path.dirname(ap)) or ""
+        return [base_name, base, series, "", "", "", "", "", "", "", "", ""]
+    return [
+        base_name,
+        fields.get("Title", ""),
+        fields.get("Series", ""),
+        fields.get("Number", ""),
+        fields.get("Summary", ""),
+        fields.get("Writer", ""),
+        fields.get("Genre", ""),
+        fields.get("Web", ""),
+        fields.get("PublishingStatusTachiyomi", ""),
+        fields.get("SourceMihon", ""),
+        fields.get("PublicationYear", ""),
+        fields.get("PublicationMonth", ""),
+    ]
+
+
+# 流式导出时原样输出 csv_text 的分块大小（字符数）
+_EXPORT_CHUNK_CHARS = 64 * 1024
+
+
+def export_csv_iter(
     csv_text: str,
     include_header: bool,
-    comic_dir: str,
     archives: list[str],
-) -> tuple[bytes, str]:
-    """若 csv_text 为空则从 archives 重新生成。
-    返回 (csv_bytes, suggested_filename)，其中文件名优先使用当前章节压缩包目录名 + .csv。
+) -> Iterator[bytes]:
+    """
+    逐块生成导出用的 UTF-8 CSV 字节，供流式响应使用。
+    - csv_text 为空时从 archives 并发读取 XML，按顺序每读完一个压缩包即产出一行
+    - 需要补表头时逐行重写；否则将 csv_text 分块编码输出
     """
+    buf = io.StringIO()
+    w = csv.writer(buf)
+
+    def encode_row(row: list[str]) -> bytes:
+        # 复用同一个 StringIO，每行写完即取出并清空
+        _write_csv_row(buf, w, row)
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate(0)
+        return data
 
     text = csv_text or ""
     if not text.strip() and archives:
-        out = io.StringIO()
-        w = csv.writer(out)
         if include_header:
-            w.writerow(CSV_HEADERS)
-        for ap in archives:
-            base_name = os.path.basename(ap)
-            try:
-                xml_bytes = read_xml_from_archive(ap)
-                if xml_bytes is None:
-                    base = os.path.splitext(base_name)[0]
-                    series = os.path.basename(os.path.dirname(ap)) or ""
-                    w.writerow([base_name, base, series, "", "", "", "", "", "", "", "", ""])
-                else:
-                    fields = parse_xml_fields(xml_bytes)
-                    w.writerow([
-                        base_name,
-                        fields.get("Title", ""),
-                        fields.get("Series", ""),
-                        fields.get("Number", ""),
-                        fields.get("Summary", ""),
-                        fields.get("Writer", ""),
-                        fields.get("Genre", ""),
-                        fields.get("Web", ""),
-                        fields.get("PublishingStatusTachiyomi", ""),
-                        fields.get("SourceMihon", ""),
-                        fields.get("PublicationYear", ""),
-                        fields.get("PublicationMonth", ""),
-                    ])
-            except Exception:
-                w.writerow([base_name] + [""] * 11)
-        text = out.getvalue()
-
-    rows = list(csv.reader(io.StringIO(text or "")))
-    if include_header and rows and [c.strip() for c in rows[0]] != CSV_HEADERS:
-        out = io.StringIO()
-        w = csv.writer(out)
-        w.writerow(CSV_HEADERS)
-        for r in rows:
-            w.writerow(r)
-        data = out.getvalue().encode("utf-8")
-    else:
-        data = (text or "").encode("utf-8")
+            yield encode_row(CSV_HEADERS)
+        for ap, fields in zip(archives, _iter_fields_concurrently(archives)):
+            yield encode_row(_export_archive_row(ap, fields))
+        return
+
+    if include_header:
+        reader = csv.reader(io.StringIO(text))
+        first = next(reader, None)
+        if first is not None and not _is_csv_header(first):
+            yield encode_row(CSV_HEADERS)
+            yield encode_row(first)
+            for r in reader:
+                yield encode_row(r)
+            return
 
+    for i in range(0, len(text), _EXPORT_CHUNK_CHARS):
+        yield text[i:i + _EXPORT_CHUNK_CHARS].encode("utf-8")
+
+
+def export_csv_filename(comic_dir: str) -> str:
+    """导出文件名：优先使用当前章节压缩包目录名 + .csv。"""
     dir_name = os.path.basename(comic_dir) if comic_dir else "comicinfo"
     # 直接使用当前章节压缩包目录名作为下载文件名主体，由上层 _build_content_disposition 负责处理非 ASCII 情况
-    filename = f"{dir_name or 'comicinfo'}.csv"
-    return (data, filename)
+    return f"{dir_name or 'comicinfo'}.csv"
 
 
-def import_csv_content(file_content: bytes | str, include_header: bool) -> str:
-    """解析上传的 CSV 文件内容，返回 CSV 文本。若 include_header 为 False 且首行为表头则去掉。"""
-    if isinstance(file_content, bytes):
-        try:
-            content = file_content.decode("utf-8")
-        except Exception:
-            content = file_content.decode("utf-8", errors="ignore")
-    else:
-        content = file_content or ""
-    rows = list(csv.reader(io.StringIO(content)))
-    if not include_header and rows and [c.strip() for c in rows[0]] == CSV_HEADERS:
-        out = io.StringIO()
-        w = csv.writer(out)
-        for r in rows[1:]:
-            w.writerow(r)
-        return out.getvalue()
-    return content
+def _strip_import_header(content: str, include_header: bool) -> str:
+    """include_header 为 False 且首行为表头时去掉首行；逐行处理，不把全部行读入列表。"""
+    if include_header:
+        return content
+    reader = csv.reader(io.StringIO(content))
+    first = next(reader, None)
+    if first is None or not _is_csv_header(first):
+        return content
+    out = io.StringIO()
+    csv.writer(out).writerows(reader)
+    return out.getvalue()
+
+
+def import_csv_file(fp: BinaryIO, include_header: bool) -> str:
+    """
+    解析上传的 CSV 文件，返回 CSV 文本。若 include_header 为 False 且首行为表头则去掉。
+    直接从二进制文件对象（如上传的临时文件）解码读取，不先读出完整的 bytes 副本；
+    errors="ignore" 对合法 UTF-8 与严格解码结果相同。
+    """
+    text = io.TextIOWrapper(fp, encoding="utf-8", errors="ignore", newline="")
+    try:
+        content = text.read()
+    finally:
+        # 解除包装，避免 TextIOWrapper 回收时顺带关闭上传文件
+        text.detach()
+    return _strip_import_header(content, include_header)
 
 
 # ---------------------------------------------------------------------------
@@ -641,10 +882,11 @@ def import_csv_content(file_content: bytes | str, include_header: bool) -> str:
 
 
 def extract_headers(csv_text: str) -> list[str]:
-    rows = list(csv.reader(io.StringIO(csv_text or "")))
-    if not rows:
+    # 只解析首行，不物化整份 CSV
+    first = next(csv.reader(io.StringIO(csv_text or "")), None)
+    if first is None:
         return []
-    return [c.strip() for c in rows[0]]
+    return [c.strip() for c in first]
 
 
 def resolve_selected_columns(
@@ -667,15 +909,16 @@ def _batch_apply(
     selected_columns: list[str],
     row_mutator: Any,
 ) -> str:
-    """row_mutator(row: list, indices: list[int]) -> list."""
+    """row_mutator(row: list, indices: tuple[int, ...]) -> list."""
     if not csv_text or not selected_columns:
         return csv_text
     try:
+        # 逐行读取、原地修改并写出，不先物化全部行
         reader = csv.reader(io.StringIO(csv_text))
-        rows = list(reader)
-        if not rows:
+        first = next(reader, None)
+        if first is None:
             return csv_text
-        header = [c.strip() for c in rows[0]]
+        header = [c.strip() for c in first]
         name_to_idx = {name: idx for idx, name in enumerate(header)}
         indices: list[int] = []
         if include_header and header and header[:1] == ["FileName"]:
@@ -693,17 +936,19 @@ def _batch_apply(
                     indices.append(idx)
         if not indices:
             return csv_text
+        indices_t = tuple(indices)
+        pad_to = max(indices_t) + 1
         output = io.StringIO()
         writer = csv.writer(output)
-        for i, row in enumerate(rows):
-            is_header = i == 0 and include_header and header[:1] == ["FileName"]
-            if is_header:
-                writer.writerow(row)
-                continue
-            max_needed = max(indices)
-            if len(row) <= max_needed:
-                row = row + [""] * (max_needed + 1 - len(row))
-            writer.writerow(row_mutator(row, indices))
+        rows = reader
+        if include_header and header[:1] == ["FileName"]:
+            _write_csv_row(output, writer, first)
+        else:
+            rows = itertools.chain((first,), reader)
+        for row in rows:
+            if len(row) < pad_to:
+                row.extend([""] * (pad_to - len(row)))
+            _write_csv_row(output, writer, row_mutator(row, indices_t))
         return output.getvalue()
     except Exception:
         return csv_text
@@ -715,7 +960,7 @@ def batch_set(
     columns: list[str],
     value: str,
 ) -> str:
-    def mut(row: list, idxs: list[int]):
+    def mut(row: list, idxs: tuple[int, ...]):
         for j in idxs:
             row[j] = value or ""
         return row
@@ -736,7 +981,7 @@ def batch_find_replace(
     if find_s == "":
         return csv_text
 
-    def mut(row: list, idxs: list[int]):
+    def mut(row: list, idxs: tuple[int, ...]):
         for j in idxs:
             cell = row[j] or ""
             if use_regex:
@@ -760,7 +1005,7 @@ def batch_prefix(
 ) -> str:
     pre = prefix or ""
 
-    def mut(row: list, idxs: list[int]):
+    def mut(row: list, idxs: tuple[int, ...]):
         for j in idxs:
             row[j] = pre + (row[j] or "")
         return row
@@ -776,7 +1021,7 @@ def batch_suffix(
 ) -> str:
     suf = suffix or ""
 
-    def mut(row: list, idxs: list[int]):
+    def mut(row: list, idxs: tuple[int, ...]):
         for j in idxs:
             row[j] = (row[j] or "") + suf
         return row
@@ -784,6 +1029,12 @@ def batch_suffix(
     return _batch_apply(csv_text, include_header, cols, mut)
 
 
+@lru_cache(maxsize=4)
+def _get_converter(mode: str) -> Any:
+    """按 mode 缓存 OpenCC 实例：构造时会读取并解析词典文件，转换本身无状态，可跨请求、跨线程复用。"""
+    return opencc.OpenCC(mode)
+
+
 def batch_convert(
     csv_text: str,
     include_header: bool,
@@ -794,11 +1045,11 @@ def batch_convert(
     if opencc is None:
         return csv_text
     try:
-        converter = opencc.OpenCC(mode)
+        converter = _get_converter(mode)
     except Exception:
         return csv_text
 
-    def mut(row: list, idxs: list[int]):
+    def mut(row: list, idxs: tuple[int, ...]):
         for j in idxs:
             if row[j]:
                 row[j] = converter.convert(row[j])
@@ -811,13 +1062,13 @@ def batch_convert_all(csv_text: str, include_header: bool, mode: str) -> str:
     if opencc is None:
         return csv_text
     try:
-        converter = opencc.OpenCC(mode)
+        converter = _get_converter(mode)
     except Exception:
         return csv_text
     headers = extract_headers(csv_text) if include_header else CSV_HEADERS
     cols = [h for h in headers if h and h != "FileName"] or CSV_HEADERS[1:]
 
-    def mut(row: list, idxs: list[int]):
+    def mut(row: list, idxs: tuple[int, ...]):
         for j in idxs:
             if row[j]:
                 row[j] = converter.convert(row[j])
@@ -830,6 +1081,8 @@ def batch_convert_all(csv_text: str, include_header: bool, mode: str) -> str:
 # ---------------------------------------------------------------------------
 
 _PLACEHOLDER_RE = re.compile(r"\{(\w+)(?::(\d+))?\}")
+_WS_RE = re.compile(r"\s+")
+_UNSAFE_FS_RE = re.compile(r'[/\\:*?"<>|]')
 
 
 def _replace_placeholders(
@@ -871,9 +1124,9 @@ def _sanitize_filename(name: str, ws_replace_char: str) -> str:
     """去头尾空白，可选将内部空白替换为指定字符，并过滤非法文件名字符。"""
     s = name.strip()
     if ws_replace_char:
-        s = re.sub(r"\s+", ws_replace_char, s)
+        s = _WS_RE.sub(ws_replace_char, s)
     # 替换非法文件名字符（兼容 Windows/Linux）
-    s = re.sub(r'[/\\:*?"<>|]', "_", s)
+    s = _UNSAFE_FS_RE.sub("_", s)
     return s
 
 
@@ -918,13 +1171,13 @@ def preview_rename_by_rule(
             continue
         row_map[fn] = r
 
-    processed: list[tuple[str, list[str]]] = []
+    processed: list[tuple[str, list[str]]] = []  # (old_name, row)
     for ap in archives:
         name = os.path.basename(ap)
         row = row_map.get(name)
         if row is None:
             continue
-        processed.append((ap, row))
+        processed.append((name, row))
 
     if not processed:
         return ([], "错误：无匹配的 CSV 行")
@@ -932,8 +1185,7 @@ def preview_rename_by_rule(
     result: list[tuple[str, str]] = []
     used_names: set[str] = set()
 
-    for ap, row in processed:
-        old_name = os.path.basename(ap)
+    for old_name, row in processed:
         ext = os.path.splitext(old_name)[1] or ".cbz"
         base = _replace_placeholders(rule, row, header, name_to_idx)
         base = _sanitize_filename(base, ws_replace_char)
@@ -943,11 +1195,12 @@ def preview_rename_by_rule(
 
         if conflict_mode == "suffix":
             candidate = new_basename
-            suffix = 2
-            while candidate in used_names:
+            if candidate in used_names:
                 stem, ext_part = os.path.splitext(new_basename)
-                candidate = f"{stem} ({suffix}){ext_part}"
-                suffix += 1
+                suffix = 2
+                while candidate in used_names:
+                    candidate = f"{stem} ({suffix}){ext_part}"
+                    suffix += 1
             new_basename = candidate
         elif new_basename in used_names:
             continue
@@ -994,8 +1247,8 @@ def rename_archives_by_rule(
         header = CSV_HEADERS
         name_to_idx = {name: idx for idx, name in enumerate(header)}
 
-    # 建立 archive 路径 -> 行 的映射（按 archives 顺序）
-    archive_to_row: list[tuple[str, list[str] | None]] = []  # (ap, row or None if skipped)
+    # 按 archives 顺序找出 CSV 中有对应行的压缩包
+    processed: list[tuple[str, str, list[str]]] = []  # (ap, old_name, row)
     row_map: dict[str, list[str]] = {}
     for r in data_rows:
         if not r:
@@ -1010,11 +1263,9 @@ def rename_archives_by_rule(
         row = row_map.get(name)
         if row is None:
             logs.append(f"跳过：CSV 未提供对应行 -> {name}")
-            archive_to_row.append((ap, None))
             continue
-        archive_to_row.append((ap, row))
+        processed.append((ap, name, row))
 
-    processed = [(ap, row) for ap, row in archive_to_row if row is not None]
     if not processed:
         return (csv_text, "错误：无匹配的 CSV 行", archives)
 
@@ -1022,8 +1273,7 @@ def rename_archives_by_rule(
     new_names: list[tuple[str, list[str], str]] = []  # (old_path, row, new_basename)
     used_names: set[str] = set()
 
-    for ap, row in processed:
-        old_name = os.path.basename(ap)
+    for ap, old_name, row in processed:
         ext = os.path.splitext(old_name)[1] or ".cbz"
         base = _replace_placeholders(rule, row, header, name_to_idx)
         base = _sanitize_filename(base, ws_replace_char)
@@ -1034,11 +1284,12 @@ def rename_archives_by_rule(
         # 冲突处理
         if conflict_mode == "suffix":
             candidate = new_basename
-            suffix = 2
-            while candidate in used_names:
+            if candidate in used_names:
                 stem, ext_part = os.path.splitext(new_basename)
-                candidate = f"{stem} ({suffix}){ext_part}"
-                suffix += 1
+                suffix = 2
+                while candidate in used_names:
+                    candidate = f"{stem} ({suffix}){ext_part}"
+                    suffix += 1
             new_basename = candidate
         elif new_basename in used_names:
             logs.append(f"跳过(冲突)：{old_name} -> {new_basename}")
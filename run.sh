@@ -8,4 +8,5 @@ cd "$SCRIPT_DIR"
 # FastAPI + HTMX：仅「编辑压缩包内 XML」
 # 可选环境变量：ALLOWED_BASE_PATHS（逗号分隔）、SESSION_SECRET
 export ALLOWED_BASE_PATHS="/home/syaofox/Downloads/1"
+# uvloop / httptools 随 uvicorn[standard] 安装，uvicorn 默认（auto）会自动启用
 uv run uvicorn app:app --host 0.0.0.0 --port 8000
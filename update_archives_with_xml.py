@@ -1,29 +1,47 @@
 import argparse
 import os
 import re
+import shutil
 import sys
 import tempfile
 import zipfile
 from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import List, Optional, Tuple
 
 from lxml import etree
 
 
+# 匹配用正则在模块加载时编译一次，避免每次调用查 re 的内部缓存
+_NORMALIZE_RE = re.compile(r"[\s\-_\[\]（）()【】{}:：~·•.,，。!！?？'" "`·]+")
+_VOLUME_RE = re.compile(r"卷")
+_CHAPTER_UNIT_RE = re.compile(r"[回話话]")
+_PAGE_SUFFIX_RE = re.compile(r"[\-_\s]\d{1,4}p\b", re.IGNORECASE)
+_CHAPTER_INDEX_PATTERNS = tuple(
+    re.compile(pat)
+    for pat in (
+        # 连载第093.2話 / 第093_2话 / 093-2話
+        r"[第连載连载]?\s*(\d{1,4})[\._\-＿\s]+(\d{1,2})\s*[話话]",
+        # 纯数字子章节：093.2 / 093_2 / 093-2（避免后续紧跟数字）
+        r"[第连載连载]?\s*(\d{1,4})[\._\-＿\s]+(\d{1,2})(?!\d)",
+        # 仅主章节：第093話 / 连载第093话 / 093話
+        r"[第连載连载]?\s*(\d{1,4})\s*[話话]",
+        # 仅主章节：开头即数字（避免把年份等长串误判，这里限制到 4 位）
+        r"^\D*?(\d{1,4})(?!\d)",
+    )
+)
+
+
 def normalize_text(text: str) -> str:
     """
     规范化用于匹配的字符串：小写、去空白、去常见符号。
     """
     lowered = text.lower()
     # 去除常见分隔符与标点（保留数字和字母及汉字）
-    cleaned = re.sub(r"[\s\-_\[\]（）()【】{}:：~·•.,，。!！?？'" "`·]+", "", lowered)
+    cleaned = _NORMALIZE_RE.sub("", lowered)
     return cleaned
 
 
-def fuzzy_ratio(a: str, b: str) -> float:
-    return SequenceMatcher(None, normalize_text(a), normalize_text(b)).ratio()
-
-
 def classify_unit(text: str) -> Optional[str]:
     """
     粗分类单位：卷 或 回/话。
@@ -31,9 +49,9 @@ def classify_unit(text: str) -> Optional[str]:
     - 返回 'chapter' 表示章节（包含“回”、“話”、“话”）
     - 无法判断返回 None
     """
-    if re.search(r"卷", text):
+    if _VOLUME_RE.search(text):
         return "volume"
-    if re.search(r"[回話话]", text):
+    if _CHAPTER_UNIT_RE.search(text):
         return "chapter"
     return None
 
@@ -50,22 +68,11 @@ def extract_chapter_index(text: str) -> Optional[Tuple[int, Optional[int]]]:
     返回 None 表示无法可靠解析。
     """
     # 去除容易干扰的页数字样式，例如 "_24p"、" 24P"
-    cleaned = re.sub(r"[\-_\s]\d{1,4}p\b", " ", text, flags=re.IGNORECASE)
-
-    # 常见形式：带話/话尾缀，且存在子章节
-    patterns = [
-        # 连载第093.2話 / 第093_2话 / 093-2話
-        r"[第连載连载]?\s*(\d{1,4})[\._\-＿\s]+(\d{1,2})\s*[話话]",
-        # 纯数字子章节：093.2 / 093_2 / 093-2（避免后续紧跟数字）
-        r"[第连載连载]?\s*(\d{1,4})[\._\-＿\s]+(\d{1,2})(?!\d)",
-        # 仅主章节：第093話 / 连载第093话 / 093話
-        r"[第连載连载]?\s*(\d{1,4})\s*[話话]",
-        # 仅主章节：开头即数字（避免把年份等长串误判，这里限制到 4 位）
-        r"^\D*?(\d{1,4})(?!\d)",
-    ]
+    cleaned = _PAGE_SUFFIX_RE.sub(" ", text)
 
-    for idx, pat in enumerate(patterns):
-        m = re.search(pat, cleaned)
+    # 常见形式见 _CHAPTER_INDEX_PATTERNS，按优先级依次尝试
+    for pat in _CHAPTER_INDEX_PATTERNS:
+        m = pat.search(cleaned)
         if m:
             main = int(m.group(1))
             sub: Optional[int] = None
@@ -121,14 +128,33 @@ def discover_xmls(xml_root: str) -> List[Tuple[str, str, str]]:
     return items
 
 
+_ARCHIVE_EXTS = frozenset({".cbz", ".zip"})
+
+
 def list_archives(comic_dir: str) -> List[str]:
-    exts = {".cbz", ".zip"}
-    return [
-        os.path.join(comic_dir, f)
-        for f in os.listdir(comic_dir)
-        if os.path.isfile(os.path.join(comic_dir, f))
-        and os.path.splitext(f)[1].lower() in exts
-    ]
+    # scandir 的 DirEntry.is_file() 通常直接使用目录项类型，省去逐个 stat
+    with os.scandir(comic_dir) as it:
+        return [
+            entry.path
+            for entry in it
+            if os.path.splitext(entry.name)[1].lower() in _ARCHIVE_EXTS and entry.is_file()
+        ]
+
+
+@lru_cache(maxsize=4096)
+def _candidate_features(
+    path: str,
+) -> Tuple[str, Optional[Tuple[int, Optional[int]]], Optional[str]]:
+    """
+    解析候选压缩包名一次：(规范化名, 章节索引, 单位)。
+    main 会对每个 XML 调用 best_match（策略 both 时两次），候选集合不变，缓存避免重复解析。
+    """
+    name_wo_ext, _ = os.path.splitext(os.path.basename(path))
+    return (
+        normalize_text(name_wo_ext),
+        extract_chapter_index(name_wo_ext),
+        classify_unit(name_wo_ext),
+    )
 
 
 def best_match(query: str, candidates: List[str]) -> Tuple[Optional[str], float]:
@@ -141,27 +167,19 @@ def best_match(query: str, candidates: List[str]) -> Tuple[Optional[str], float]
     """
     query_idx = extract_chapter_index(query)
     query_unit = classify_unit(query)
+    query_norm = normalize_text(query)
 
     best_path: Optional[str] = None
     best_score: float = 0.0
 
     # 按文件名排序遍历候选，确保在分数相同的情况下优先选择文件名靠前的压缩包（确定性行为）
     for path in sorted(candidates, key=lambda p: os.path.basename(p)):
-        fname = os.path.basename(path)
-        name_wo_ext, _ = os.path.splitext(fname)
+        cand_norm, cand_idx, cand_unit = _candidate_features(path)
 
-        score = 0.0
         # 优先：规范化后完全相等的名字最优先
-        try:
-            if normalize_text(query) == normalize_text(name_wo_ext):
-                score = 1.0
-            else:
-                score = 0.0
-        except Exception:
-            score = 0.0
+        score = 1.0 if query_norm == cand_norm else 0.0
 
         if query_idx is not None:
-            cand_idx = extract_chapter_index(name_wo_ext)
             if cand_idx is not None:
                 # 完全一致（主+子章节）
                 if cand_idx == query_idx:
@@ -179,14 +197,13 @@ def best_match(query: str, candidates: List[str]) -> Tuple[Optional[str], float]
             else:
                 # 仅在非完全名称匹配时使用模糊匹配
                 if score < 1.0:
-                    score = fuzzy_ratio(query, name_wo_ext)
+                    score = SequenceMatcher(None, query_norm, cand_norm).ratio()
         else:
             # 仅在非完全名称匹配时使用模糊匹配
             if score < 1.0:
-                score = fuzzy_ratio(query, name_wo_ext)
+                score = SequenceMatcher(None, query_norm, cand_norm).ratio()
 
         # 单位强约束：卷/回(話)必须一致
-        cand_unit = classify_unit(name_wo_ext)
         if query_unit and cand_unit and query_unit != cand_unit:
             score = 0.0
 
@@ -235,8 +252,9 @@ def update_archive_with_xml(
                         if info.filename.lower() == "comicinfo.xml":
                             if force:
                                 continue
-                        data = zf.read(info.filename)
-                        zfw.writestr(info, data)
+                        # 分块流式复制，不把整张图片读入内存
+                        with zf.open(info) as src, zfw.open(info, "w") as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
 
                     # 写入/覆盖 ComicInfo.xml
                     with open(xml_path, "rb") as xf: